@@ -1,5 +1,5 @@
 """Analytics API endpoints."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from app.api.auth import get_current_user
 from app.services import get_database_service
@@ -7,6 +7,36 @@ from app.services import get_database_service
 router = APIRouter()
 
 
+def coverage_percentage(dashboard: dict) -> float:
+    covered = dashboard["clusters_by_coverage"].get("covered", 0)
+    total = dashboard["total_clusters"]
+    return round(covered / total * 100, 1) if total else 0
+
+
+@router.get("/dashboard")
+async def get_dashboard(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get dashboard analytics for the organization (aggregated in the database, one round trip)."""
+    db = get_database_service()
+    
+    dashboard = await db.get_analytics_dashboard(current_user["org_id"], limit=limit)
+    knowledge = dashboard["knowledge_by_status"]
+    
+    return {
+        "total_tickets": dashboard["total_tickets"],
+        "total_clusters": dashboard["total_clusters"],
+        "pending_approvals": knowledge.get("pending", 0),
+        "knowledge_entries": knowledge.get("approved", 0),
+        "tickets_by_category": {c["name"]: c["ticket_count"] for c in dashboard["categories"]},
+        "clusters_by_status": dashboard["clusters_by_coverage"],
+        "knowledge_by_status": knowledge,
+        "coverage_percentage": coverage_percentage(dashboard),
+        "recent_activity": dashboard["recent_activity"]
+    }
+
+
 @router.get("/summary")
 async def get_summary(
     current_user: dict = Depends(get_current_user)
@@ -14,26 +44,18 @@ async def get_summary(
     """Get overall analytics summary for the organization."""
     db = get_database_service()
     
-    # Get clusters
-    clusters = await db.get_clusters(current_user["org_id"])
-    
-    # Get knowledge entries
-    knowledge = await db.get_knowledge_entries(current_user["org_id"])
-    approved_knowledge = [k for k in knowledge if k["status"] == "approved"]
-    pending_knowledge = [k for k in knowledge if k["status"] == "pending"]
-    
-    # Calculate totals
-    total_tickets = sum(c.get("ticket_count", 0) for c in clusters)
+    dashboard = await db.get_analytics_dashboard(current_user["org_id"])
+    knowledge = dashboard["knowledge_by_status"]
     
     return {
-        "total_clusters": len(clusters),
-        "total_tickets": total_tickets,
+        "total_clusters": dashboard["total_clusters"],
+        "total_tickets": dashboard["total_tickets"],
         "knowledge_entries": {
-            "total": len(knowledge),
-            "approved": len(approved_knowledge),
-            "pending": len(pending_knowledge)
+            "total": sum(knowledge.values()),
+            "approved": knowledge.get("approved", 0),
+            "pending": knowledge.get("pending", 0)
         },
-        "top_clusters": clusters[:5]
+        "top_clusters": dashboard["top_clusters"]
     }
 
 
@@ -41,25 +63,12 @@ async def get_summary(
 async def get_by_category(
     current_user: dict = Depends(get_current_user)
 ):
-    """Get analytics breakdown by category."""
+    """Get analytics breakdown by category (cluster name as proxy), largest first."""
     db = get_database_service()
     
-    clusters = await db.get_clusters(current_user["org_id"])
-    
-    # Group by cluster name (as proxy for category)
-    categories = {}
-    for cluster in clusters:
-        name = cluster.get("sme_name") or cluster.get("auto_name", "Unknown")
-        if name not in categories:
-            categories[name] = {
-                "name": name,
-                "cluster_count": 0,
-                "ticket_count": 0
-            }
-        categories[name]["cluster_count"] += 1
-        categories[name]["ticket_count"] += cluster.get("ticket_count", 0)
+    categories = await db.get_cluster_categories(current_user["org_id"])
     
-    return {"categories": list(categories.values())}
+    return {"categories": categories}
 
 
 @router.get("/knowledge-coverage")
@@ -69,20 +78,24 @@ async def get_knowledge_coverage(
     """Get knowledge coverage - which clusters have approved knowledge."""
     db = get_database_service()
     
-    clusters = await db.get_clusters(current_user["org_id"])
-    knowledge = await db.get_knowledge_entries(current_user["org_id"], status="approved")
-    
-    # Get cluster IDs with knowledge
-    clusters_with_knowledge = set(k.get("cluster_id") for k in knowledge)
-    
-    covered = [c for c in clusters if c["id"] in clusters_with_knowledge]
-    uncovered = [c for c in clusters if c["id"] not in clusters_with_knowledge]
-    
-    coverage_pct = (len(covered) / len(clusters) * 100) if clusters else 0
+    dashboard = await db.get_analytics_dashboard(current_user["org_id"])
+    covered = dashboard["clusters_by_coverage"].get("covered", 0)
     
     return {
-        "coverage_percentage": round(coverage_pct, 1),
-        "covered_clusters": len(covered),
-        "uncovered_clusters": len(uncovered),
-        "uncovered_list": uncovered[:10]  # Top 10 uncovered
+        "coverage_percentage": coverage_percentage(dashboard),
+        "covered_clusters": covered,
+        "uncovered_clusters": dashboard["total_clusters"] - covered,
+        "uncovered_list": dashboard["uncovered_clusters"]  # Top 10 uncovered
     }
+
+
+@router.get("/token-usage")
+async def get_token_usage(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get LLM token usage for the organization: totals, per call type, per upload and the newest jobs."""
+    db = get_database_service()
+    
+    # Ingestion (upload processing) plus re-clustering / bulk assessment jobs, summed in the database
+    return await db.get_token_usage(current_user["org_id"], limit=limit)
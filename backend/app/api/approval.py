@@ -1,44 +1,68 @@
 """Approval API endpoints - PO approval workflow."""
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from typing import Optional
 
 from app.api.auth import get_current_user, require_role
 from app.services import get_database_service, get_embedding_service
+from app.services.database.base import KNOWLEDGE_SORT_KEYS
+from app.services.assessment import invalidate_assessments_for_knowledge, run_bulk_assessment
+from app.services.knowledge_index import invalidate_knowledge_index
+from app.services.lexical_index import add_to_lexical_index
+from app.services.llm import LLMPriority
 from app.models.user import UserRole
 from app.models.knowledge import KnowledgeApproval
+from app.utils.helpers import next_page_cursor
 
 router = APIRouter()
 
 
 @router.get("/queue")
 async def get_approval_queue(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(require_role([UserRole.ADMIN, UserRole.PO]))
 ):
-    """Get pending knowledge entries awaiting approval."""
+    """
+    Get pending knowledge entries awaiting approval, newest first.
+    With a limit, pass the returned next_cursor to fetch the following page.
+    """
     db = get_database_service()
     
-    entries = await db.get_knowledge_entries(
-        org_id=current_user["org_id"],
-        status="pending"
-    )
+    try:
+        entries = await db.get_knowledge_entries(
+            org_id=current_user["org_id"],
+            status="pending",
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    return {"pending": entries, "count": len(entries)}
+    return {
+        "pending": entries,
+        "count": len(entries),
+        "next_cursor": next_page_cursor(entries, limit, KNOWLEDGE_SORT_KEYS)
+    }
 
 
 @router.post("/{entry_id}/approve")
 async def approve_entry(
     entry_id: str,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(require_role([UserRole.ADMIN, UserRole.PO]))
 ):
     """
     Approve a knowledge entry.
     This generates an embedding and makes it available for RAG retrieval.
+    Assessments of clusters close to the entry are marked stale and
+    regenerated in the background, so viewers read precomputed results.
     """
     db = get_database_service()
     embedding_service = get_embedding_service()
     
     # Get entry
-    entries = await db.get_knowledge_entries(current_user["org_id"])
-    entry = next((e for e in entries if e["id"] == entry_id), None)
+    entry = await db.get_knowledge_entry(entry_id, current_user["org_id"])
     
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
@@ -55,24 +79,48 @@ async def approve_entry(
     """
     embedding = await embedding_service.embed_text(knowledge_text)
     
-    # Update status to approved
+    # Update status to approved and store the embedding for retrieval
     await db.update_knowledge_status(
         entry_id=entry_id,
         status="approved",
-        approved_by=current_user["user_id"]
+        approved_by=current_user["user_id"],
+        embedding=embedding
     )
-    
-    # Store embedding (would need to add this to the entry)
-    # For now, we'll handle this in the search function
+    invalidate_knowledge_index(current_user["org_id"])
+    await add_to_lexical_index(current_user["org_id"], {**entry, "status": "approved"})
     
     # Create audit log
     await db.create_audit_log(
+        org_id=current_user["org_id"],
         knowledge_id=entry_id,
         action="approved",
         actor_id=current_user["user_id"]
     )
     
-    return {"status": "success", "message": "Knowledge entry approved"}
+    # Re-assess affected clusters at background priority
+    cluster_ids = await invalidate_assessments_for_knowledge(current_user["org_id"], embedding)
+    job_id = None
+    if cluster_ids:
+        job = await db.create_job(
+            org_id=current_user["org_id"],
+            job_type="reassessment",
+            params={"knowledge_id": entry_id, "cluster_ids": cluster_ids}
+        )
+        job_id = job["id"]
+        background_tasks.add_task(
+            run_bulk_assessment,
+            job_id=job_id,
+            org_id=current_user["org_id"],
+            cluster_ids=cluster_ids,
+            priority=LLMPriority.BACKGROUND
+        )
+    
+    return {
+        "status": "success",
+        "message": "Knowledge entry approved",
+        "stale_clusters": len(cluster_ids),
+        "reassessment_job_id": job_id
+    }
 
 
 @router.post("/{entry_id}/reject")
@@ -85,8 +133,7 @@ async def reject_entry(
     db = get_database_service()
     
     # Get entry
-    entries = await db.get_knowledge_entries(current_user["org_id"])
-    entry = next((e for e in entries if e["id"] == entry_id), None)
+    entry = await db.get_knowledge_entry(entry_id, current_user["org_id"])
     
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
@@ -100,9 +147,11 @@ async def reject_entry(
         status="rejected",
         rejection_reason=rejection.rejection_reason
     )
+    invalidate_knowledge_index(current_user["org_id"])
     
     # Create audit log
     await db.create_audit_log(
+        org_id=current_user["org_id"],
         knowledge_id=entry_id,
         action="rejected",
         actor_id=current_user["user_id"],
@@ -114,19 +163,33 @@ async def reject_entry(
 
 @router.get("/history")
 async def get_approval_history(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(require_role([UserRole.ADMIN, UserRole.PO]))
 ):
-    """Get history of approved/rejected entries."""
+    """
+    Get history of approved/rejected entries, newest first.
+    Totals cover all entries; with a limit, pass next_cursor for the following page.
+    """
     db = get_database_service()
     
-    all_entries = await db.get_knowledge_entries(current_user["org_id"])
-    
-    approved = [e for e in all_entries if e["status"] == "approved"]
-    rejected = [e for e in all_entries if e["status"] == "rejected"]
+    try:
+        entries, counts = await asyncio.gather(
+            db.list_knowledge_by_status(
+                current_user["org_id"],
+                ["approved", "rejected"],
+                limit=limit,
+                cursor=cursor
+            ),
+            db.count_knowledge_by_status(current_user["org_id"])
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     return {
-        "approved": approved,
-        "rejected": rejected,
-        "total_approved": len(approved),
-        "total_rejected": len(rejected)
+        "approved": [e for e in entries if e["status"] == "approved"],
+        "rejected": [e for e in entries if e["status"] == "rejected"],
+        "total_approved": counts.get("approved", 0),
+        "total_rejected": counts.get("rejected", 0),
+        "next_cursor": next_page_cursor(entries, limit, KNOWLEDGE_SORT_KEYS)
     }
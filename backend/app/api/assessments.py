@@ -1,22 +1,73 @@
 """Assessment API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from typing import Optional
 
 from app.api.auth import get_current_user
 from app.services import get_database_service
-from app.services.assessment import generate_assessment
-from app.models.cluster import ClusterAssessment
+from app.services.assessment import generate_assessment, run_bulk_assessment
+from app.services.llm import LLMOutputError
+from app.models.cluster import BulkAssessmentRequest, ClusterAssessment
 
 router = APIRouter()
 
 
+@router.get("/", response_model=list[ClusterAssessment])
+async def list_assessments(
+    cluster_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """List stored assessments for the organization (latest per cluster, fresh ones preferred)."""
+    db = get_database_service()
+    records = await db.get_latest_assessments(current_user["org_id"], cluster_id=cluster_id)
+    
+    return [record["assessment"] for record in records]
+
+
+@router.post("/generate")
+async def generate_assessments(
+    request: BulkAssessmentRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Assess all clusters of an upload (or the organization) in a background job.
+    Clusters with a still-valid stored assessment are skipped unless force_refresh is set.
+    """
+    db = get_database_service()
+    
+    if request.upload_id and not await db.get_upload(request.upload_id, current_user["org_id"]):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    job = await db.create_job(
+        org_id=current_user["org_id"],
+        job_type="bulk_assessment",
+        upload_id=request.upload_id,
+        params=request.model_dump(exclude_none=True)
+    )
+    
+    background_tasks.add_task(
+        run_bulk_assessment,
+        job_id=job["id"],
+        org_id=current_user["org_id"],
+        upload_id=request.upload_id,
+        cluster_ids=request.cluster_ids,
+        concurrency=request.concurrency,
+        force_refresh=request.force_refresh
+    )
+    
+    return {"job_id": job["id"], "status": "queued"}
+
+
 @router.get("/{cluster_id}", response_model=ClusterAssessment)
 async def get_assessment(
     cluster_id: str,
+    force_refresh: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get assessment for a cluster.
     Uses RAG to retrieve relevant knowledge and generate grounded assessment.
+    The stored assessment is returned unless the knowledge set changed or force_refresh is set.
     """
     db = get_database_service()
     
@@ -25,16 +76,20 @@ async def get_assessment(
     if not cluster:
         raise HTTPException(status_code=404, detail="Cluster not found")
     
-    # Generate assessment (with RAG)
-    assessment = await generate_assessment(
-        cluster=cluster,
-        org_id=current_user["org_id"]
-    )
+    # Stored assessment, or generate (with RAG)
+    try:
+        assessment = await generate_assessment(
+            cluster=cluster,
+            org_id=current_user["org_id"],
+            force_refresh=force_refresh
+        )
+    except LLMOutputError as e:
+        raise HTTPException(status_code=502, detail=f"Assessment generation returned invalid output: {e}")
     
     return assessment
 
 
-@router.post("/{cluster_id}/refresh")
+@router.post("/{cluster_id}/refresh", response_model=ClusterAssessment)
 async def refresh_assessment(
     cluster_id: str,
     current_user: dict = Depends(get_current_user)
@@ -47,10 +102,13 @@ async def refresh_assessment(
         raise HTTPException(status_code=404, detail="Cluster not found")
     
     # Generate fresh assessment
-    assessment = await generate_assessment(
-        cluster=cluster,
-        org_id=current_user["org_id"],
-        force_refresh=True
-    )
+    try:
+        assessment = await generate_assessment(
+            cluster=cluster,
+            org_id=current_user["org_id"],
+            force_refresh=True
+        )
+    except LLMOutputError as e:
+        raise HTTPException(status_code=502, detail=f"Assessment generation returned invalid output: {e}")
     
     return assessment
@@ -0,0 +1,37 @@
+"""Real-time classification API endpoints."""
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.auth import get_current_user
+from app.config import get_settings
+from app.services.classifier import classify_tickets
+from app.models.cluster import ClassifyRequest, TicketClassification
+
+router = APIRouter()
+
+
+@router.post("/", response_model=list[TicketClassification])
+async def classify(
+    request: ClassifyRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Tag incoming tickets with their nearest cluster and its latest assessment.
+    Accepts one or many descriptions; results are returned in the same order.
+    """
+    settings = get_settings()
+    if len(request.descriptions) > settings.CLASSIFY_MAX_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.CLASSIFY_MAX_BATCH} descriptions per request"
+        )
+    
+    matches = await classify_tickets(
+        org_id=current_user["org_id"],
+        descriptions=request.descriptions,
+        upload_id=request.upload_id
+    )
+    
+    return [
+        {"description": description, **(match or {})}
+        for description, match in zip(request.descriptions, matches)
+    ]
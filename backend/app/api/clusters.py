@@ -1,10 +1,14 @@
 """Clusters API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from typing import Optional
 
 from app.api.auth import get_current_user
 from app.services import get_database_service
-from app.models.cluster import Cluster
+from app.services.database.base import CLUSTER_SORT_KEYS
+from app.services.hierarchy import get_hierarchy, summarize_cut
+from app.services.clustering import CLUSTERING_ENGINES, recluster
+from app.models.cluster import Cluster, ReclusterRequest
+from app.utils.helpers import next_page_cursor
 
 router = APIRouter()
 
@@ -12,15 +16,95 @@ router = APIRouter()
 @router.get("/")
 async def list_clusters(
     upload_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """List all clusters for the organization."""
+    """
+    List clusters for the organization, largest first (without centroids).
+    With a limit, pass the returned next_cursor to fetch the following page.
+    """
     db = get_database_service()
-    clusters = await db.get_clusters(
+    try:
+        clusters = await db.get_clusters(
+            org_id=current_user["org_id"],
+            upload_id=upload_id,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"clusters": clusters, "next_cursor": next_page_cursor(clusters, limit, CLUSTER_SORT_KEYS)}
+
+
+@router.post("/run")
+async def run_clustering_job(
+    background_tasks: BackgroundTasks,
+    request: Optional[ReclusterRequest] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Re-cluster existing tickets without re-uploading.
+    Reuses the stored ticket embeddings; the new clusters replace the old set atomically.
+    """
+    db = get_database_service()
+    request = request or ReclusterRequest()
+    
+    if request.engine and request.engine not in CLUSTERING_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown clustering engine: {request.engine}")
+    if request.naming_mode and request.naming_mode not in ("llm", "keywords"):
+        raise HTTPException(status_code=400, detail=f"Unknown naming mode: {request.naming_mode}")
+    if request.upload_id and not await db.get_upload(request.upload_id, current_user["org_id"]):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    job = await db.create_job(
+        org_id=current_user["org_id"],
+        job_type="recluster",
+        upload_id=request.upload_id,
+        params=request.model_dump(exclude_none=True)
+    )
+    
+    background_tasks.add_task(
+        recluster,
+        job_id=job["id"],
         org_id=current_user["org_id"],
-        upload_id=upload_id
+        upload_id=request.upload_id,
+        engine=request.engine,
+        n_clusters=request.n_clusters,
+        naming_mode=request.naming_mode,
+        eps=request.eps
     )
-    return {"clusters": clusters}
+    
+    return {"job_id": job["id"], "status": "queued"}
+
+
+@router.get("/hierarchy")
+@router.get("/hierarchy/{upload_id}")
+async def get_cluster_hierarchy(
+    upload_id: Optional[str] = None,
+    n_clusters: Optional[int] = Query(None, ge=1),
+    include_centroids: bool = True,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Cut the stored cluster hierarchy of an upload (or of the org-wide
+    re-clustering when no upload is given) at any granularity.
+    Served from the persisted merge tree; embeddings are not re-read.
+    """
+    hierarchy = await get_hierarchy(current_user["org_id"], upload_id)
+    if not hierarchy:
+        raise HTTPException(status_code=404, detail="Cluster hierarchy not found")
+    
+    n_clusters = min(n_clusters or hierarchy["default_n_clusters"], hierarchy["n_leaves"])
+    clusters = summarize_cut(hierarchy, n_clusters, include_centroids=include_centroids)
+    
+    return {
+        "upload_id": upload_id,
+        "n_clusters": len(clusters),
+        "max_clusters": hierarchy["n_leaves"],
+        "default_n_clusters": hierarchy["default_n_clusters"],
+        "clusters": clusters
+    }
 
 
 @router.get("/{cluster_id}")
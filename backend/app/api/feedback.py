@@ -1,10 +1,13 @@
 """Feedback API endpoints - SME feedback submission."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 
 from app.api.auth import get_current_user, require_role
 from app.services import get_database_service, get_embedding_service
+from app.services.database.base import KNOWLEDGE_SORT_KEYS
 from app.models.user import UserRole
 from app.models.knowledge import KnowledgeCreate, KnowledgeEntry
+from app.utils.helpers import next_page_cursor
 
 router = APIRouter()
 
@@ -34,6 +37,7 @@ async def submit_feedback(
     
     # Create audit log
     await db.create_audit_log(
+        org_id=current_user["org_id"],
         knowledge_id=entry["id"],
         action="submitted",
         actor_id=current_user["user_id"],
@@ -45,18 +49,27 @@ async def submit_feedback(
 
 @router.get("/")
 async def list_my_feedback(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """List feedback submitted by current user."""
+    """
+    List feedback submitted by current user, newest first.
+    With a limit, pass the returned next_cursor to fetch the following page.
+    """
     db = get_database_service()
     
-    # Get all knowledge entries for org
-    entries = await db.get_knowledge_entries(current_user["org_id"])
-    
-    # Filter to current user's submissions
-    my_entries = [e for e in entries if e.get("submitted_by") == current_user["user_id"]]
+    try:
+        my_entries = await db.list_knowledge_by_submitter(
+            current_user["org_id"],
+            current_user["user_id"],
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    return {"feedback": my_entries}
+    return {"feedback": my_entries, "next_cursor": next_page_cursor(my_entries, limit, KNOWLEDGE_SORT_KEYS)}
 
 
 @router.get("/{feedback_id}")
@@ -67,8 +80,7 @@ async def get_feedback(
     """Get feedback details."""
     db = get_database_service()
     
-    entries = await db.get_knowledge_entries(current_user["org_id"])
-    entry = next((e for e in entries if e["id"] == feedback_id), None)
+    entry = await db.get_knowledge_entry(feedback_id, current_user["org_id"])
     
     if not entry:
         raise HTTPException(status_code=404, detail="Feedback not found")
@@ -0,0 +1,22 @@
+"""Background job API endpoints."""
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.auth import get_current_user
+from app.services import get_database_service
+
+router = APIRouter()
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get job status and progress."""
+    db = get_database_service()
+    job = await db.get_job(job_id, current_user["org_id"])
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
@@ -0,0 +1,69 @@
+"""Ticket API endpoints."""
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from app.api.auth import get_current_user
+from app.services import get_database_service
+from app.services.database.base import TICKET_SORT_KEYS
+from app.models.ticket import SimilarTicket
+from app.utils.helpers import next_page_cursor
+
+router = APIRouter()
+
+
+@router.get("/")
+async def list_tickets(
+    upload_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List the tickets of an upload, oldest first (without embeddings or raw data).
+    Pass the returned next_cursor to fetch the following page.
+    """
+    db = get_database_service()
+    try:
+        tickets = await db.get_tickets_by_upload(
+            upload_id=upload_id,
+            org_id=current_user["org_id"],
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"tickets": tickets, "next_cursor": next_page_cursor(tickets, limit, TICKET_SORT_KEYS)}
+
+
+@router.get("/{ticket_id}/similar", response_model=list[SimilarTicket])
+async def get_similar_tickets(
+    ticket_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    upload_id: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the tickets most similar to a ticket (nearest neighbours by embedding),
+    optionally restricted to an upload, a category and/or a creation date range.
+    """
+    db = get_database_service()
+    
+    similar = await db.search_similar_tickets(
+        org_id=current_user["org_id"],
+        ticket_id=ticket_id,
+        limit=limit,
+        upload_id=upload_id,
+        category=category,
+        created_after=created_after,
+        created_before=created_before
+    )
+    
+    # No matches: tell a missing ticket apart from one without neighbours
+    if not similar and not await db.get_ticket(ticket_id, current_user["org_id"]):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    return similar
@@ -1,13 +1,26 @@
 """
 Ticket Analytics Platform - Main FastAPI Application
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.api import auth, upload, clusters, assessments, feedback, approval, analytics
+from app.services.database import init_database_service, close_database_service
+from app.services.llm import close_llm_service, get_llm_service, get_structured_output_metrics
+from app.api import auth, upload, clusters, assessments, feedback, approval, analytics, jobs, tickets, classify
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks for pooled connections."""
+    await init_database_service()
+    yield
+    await close_llm_service()
+    await close_database_service()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -15,6 +28,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url=f"{settings.API_PREFIX}/docs",
     redoc_url=f"{settings.API_PREFIX}/redoc",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -34,6 +48,9 @@ app.include_router(assessments.router, prefix=f"{settings.API_PREFIX}/assessment
 app.include_router(feedback.router, prefix=f"{settings.API_PREFIX}/feedback", tags=["Feedback"])
 app.include_router(approval.router, prefix=f"{settings.API_PREFIX}/approval", tags=["Approval"])
 app.include_router(analytics.router, prefix=f"{settings.API_PREFIX}/analytics", tags=["Analytics"])
+app.include_router(jobs.router, prefix=f"{settings.API_PREFIX}/jobs", tags=["Jobs"])
+app.include_router(tickets.router, prefix=f"{settings.API_PREFIX}/tickets", tags=["Tickets"])
+app.include_router(classify.router, prefix=f"{settings.API_PREFIX}/classify", tags=["Classification"])
 
 
 @app.get("/")
@@ -57,3 +74,12 @@ async def health_check():
             "llm": "ready"
         }
     }
+
+
+@app.get(f"{settings.API_PREFIX}/metrics/llm")
+async def llm_metrics():
+    """LLM queue depth, throttling, retry, cache and structured-output metrics."""
+    return {
+        **get_llm_service().get_metrics(),
+        "structured_output": get_structured_output_metrics()
+    }
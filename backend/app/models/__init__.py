@@ -1,16 +1,17 @@
 # Pydantic models for request/response validation
 from .user import User, UserCreate, UserLogin, Token
 from .organization import Organization, OrganizationCreate
-from .ticket import Ticket, TicketCreate
-from .cluster import Cluster, ClusterCreate, ClusterAssessment
+from .ticket import Ticket, TicketCreate, SimilarTicket
+from .cluster import Cluster, ClusterCreate, ClusterAssessment, AssessmentOutput, ReclusterRequest, BulkAssessmentRequest, ClassifyRequest, TicketClassification
 from .knowledge import KnowledgeEntry, KnowledgeCreate, KnowledgeApproval
 from .schema_mapping import SchemaMapping, SchemaMappingCreate, ColumnSuggestion
 
 __all__ = [
     "User", "UserCreate", "UserLogin", "Token",
     "Organization", "OrganizationCreate",
-    "Ticket", "TicketCreate",
-    "Cluster", "ClusterCreate", "ClusterAssessment",
+    "Ticket", "TicketCreate", "SimilarTicket",
+    "Cluster", "ClusterCreate", "ClusterAssessment", "AssessmentOutput", "ReclusterRequest", "BulkAssessmentRequest",
+    "ClassifyRequest", "TicketClassification",
     "KnowledgeEntry", "KnowledgeCreate", "KnowledgeApproval",
     "SchemaMapping", "SchemaMappingCreate", "ColumnSuggestion",
 ]
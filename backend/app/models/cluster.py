@@ -1,6 +1,6 @@
 """Cluster models."""
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -27,6 +27,23 @@ class Cluster(ClusterBase):
         from_attributes = True
 
 
+class ReclusterRequest(BaseModel):
+    """Request body for re-clustering stored embeddings."""
+    upload_id: Optional[str] = None  # None = whole organization
+    engine: Optional[str] = None  # "agglomerative", "kmeans", "dbscan"
+    n_clusters: Optional[int] = Field(None, ge=1)
+    naming_mode: Optional[str] = None  # "llm" or "keywords"
+    eps: Optional[float] = Field(None, gt=0)  # DBSCAN only
+
+
+class BulkAssessmentRequest(BaseModel):
+    """Request body for assessing many clusters in one background job."""
+    upload_id: Optional[str] = None  # None = whole organization
+    cluster_ids: Optional[list[str]] = None  # Restrict to these clusters
+    concurrency: Optional[int] = Field(None, ge=1, le=32)
+    force_refresh: bool = False
+
+
 class ResolutionStep(BaseModel):
     step: str
     classification: str  # "auto", "semi", "manual"
@@ -34,6 +51,16 @@ class ResolutionStep(BaseModel):
     reason: Optional[str] = None
 
 
+class AssessmentOutput(BaseModel):
+    """LLM-generated part of a ClusterAssessment, validated before use."""
+    summary: str
+    automation_potential: float = Field(ge=0, le=100)
+    automation_level: Literal["fully_automatable", "semi_automatable", "manual"]
+    confidence: Literal["high", "medium", "low"]
+    recommendation: str
+    resolution_steps: list[ResolutionStep]
+
+
 class ClusterAssessment(BaseModel):
     """Assessment response for a cluster."""
     cluster_id: str
@@ -54,3 +81,28 @@ class ClusterAssessment(BaseModel):
     source: str  # "knowledge_base" or "llm_generic"
     knowledge_ids: list[str] = []
     needs_sme_review: bool = False
+    generated_at: Optional[datetime] = None
+
+
+class ClassifyRequest(BaseModel):
+    """Request body for real-time ticket classification."""
+    descriptions: list[str] = Field(min_length=1)
+    upload_id: Optional[str] = None  # Restrict to this upload's clusters
+
+
+class AssessmentSummary(BaseModel):
+    summary: str
+    automation_potential: float
+    automation_level: str
+    confidence: str
+    generated_at: Optional[datetime] = None
+
+
+class TicketClassification(BaseModel):
+    """Nearest cluster of a classified ticket (cluster fields are None if unclassified)."""
+    description: str
+    cluster_id: Optional[str] = None
+    cluster_name: Optional[str] = None
+    upload_id: Optional[str] = None
+    similarity: Optional[float] = None
+    assessment: Optional[AssessmentSummary] = None
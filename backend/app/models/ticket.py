@@ -28,3 +28,11 @@ class Ticket(TicketBase):
     
     class Config:
         from_attributes = True
+
+
+class SimilarTicket(TicketBase):
+    """A nearest-neighbour match for a ticket."""
+    id: str
+    upload_id: Optional[str] = None
+    created_at: datetime
+    similarity: float
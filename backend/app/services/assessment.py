@@ -1,9 +1,21 @@
 """
 Assessment service - Generate cluster assessments with RAG.
 """
+import asyncio
+import hashlib
+from contextlib import nullcontext
+from datetime import datetime
 from typing import Optional
-from app.services import get_database_service, get_embedding_service, get_llm_service
-from app.models.cluster import ClusterAssessment, ResolutionStep
+from app.config import get_settings
+from app.services import get_database_service, get_llm_service
+from app.services.database.base import CLUSTER_COLUMNS
+from app.services.llm import LLMPriority, llm_priority, llm_call_type, llm_cache_refresh, fit_to_budget, track_token_usage, chat_structured
+from app.services.rag import retrieve_knowledge_for_clusters
+from app.services.classifier import note_assessment
+from app.models.cluster import AssessmentOutput, ClusterAssessment
+
+# Bump whenever the assessment prompts change so stored assessments are regenerated
+ASSESSMENT_PROMPT_VERSION = "v2"
 
 
 async def generate_assessment(
@@ -14,43 +26,191 @@ async def generate_assessment(
     """
     Generate assessment for a cluster using RAG.
     
-    1. Generate embedding for cluster
+    1. Query with the cluster centroid (embedding name + summary if it has none)
     2. Search for similar approved knowledge
-    3. If found: Generate grounded assessment
-    4. If not found: Generate generic assessment, flag for SME review
+    3. Return the stored assessment if one exists for this knowledge set and
+       prompt version (unless force_refresh)
+    4. If found: Generate grounded assessment
+    5. If not found: Generate generic assessment, flag for SME review
     """
-    db = get_database_service()
-    embedding_service = get_embedding_service()
     llm = get_llm_service()
     
-    # 1. Generate embedding for cluster characteristics
-    cluster_text = f"{cluster.get('auto_name', '')} {cluster.get('summary', '')}"
-    cluster_embedding = await embedding_service.embed_text(cluster_text)
+    # 1-2. Search for similar approved knowledge (RAG)
+    [similar_knowledge] = await retrieve_knowledge_for_clusters(org_id, [cluster], limit=3, threshold=0.7)
     
-    # 2. Search for similar approved knowledge (RAG)
-    similar_knowledge = await db.search_similar_knowledge(
+    # 3-5. Stored assessment, or generate one
+    return await assess_cluster(
+        cluster=cluster,
         org_id=org_id,
-        embedding=cluster_embedding,
-        limit=3,
-        threshold=0.7
+        knowledge=similar_knowledge,
+        llm=llm,
+        use_stored=not force_refresh,
+        refresh_llm_cache=force_refresh
     )
+
+
+async def assess_cluster(
+    cluster: dict,
+    org_id: str,
+    knowledge: list[dict],
+    llm,
+    use_stored: bool = True,
+    refresh_llm_cache: bool = False
+) -> ClusterAssessment:
+    """
+    Return the stored assessment for this knowledge set, generating (and storing) it if needed.
+
+    use_stored=False skips the stored-assessment lookup (e.g. the caller already
+    checked it); refresh_llm_cache=True also regenerates the LLM responses
+    instead of serving them from the response cache.
+    """
+    db = get_database_service()
     
-    # 3. Generate assessment based on whether knowledge was found
-    if similar_knowledge:
-        assessment = await generate_grounded_assessment(
-            cluster=cluster,
-            knowledge=similar_knowledge,
-            llm=llm
-        )
-    else:
-        assessment = await generate_generic_assessment(
-            cluster=cluster,
-            llm=llm
+    # Cached result is valid while the knowledge set and prompts are unchanged
+    knowledge_ids = [k["id"] for k in knowledge]
+    fingerprint = knowledge_fingerprint(knowledge_ids)
+    if use_stored:
+        cached = await db.get_cached_assessment(
+            cluster_id=cluster["id"],
+            org_id=org_id,
+            knowledge_fingerprint=fingerprint,
+            prompt_version=ASSESSMENT_PROMPT_VERSION
         )
+        if cached:
+            return ClusterAssessment(**cached["assessment"])
+    
+    # Generate assessment based on whether knowledge was found
+    with llm_cache_refresh() if refresh_llm_cache else nullcontext():
+        if knowledge:
+            assessment = await generate_grounded_assessment(
+                cluster=cluster,
+                knowledge=knowledge,
+                llm=llm
+            )
+        else:
+            assessment = await generate_generic_assessment(
+                cluster=cluster,
+                llm=llm
+            )
+    assessment.generated_at = datetime.utcnow()
+    
+    record = assessment.model_dump(mode="json")
+    await db.save_cached_assessment({
+        "org_id": org_id,
+        "cluster_id": cluster["id"],
+        "knowledge_fingerprint": fingerprint,
+        "knowledge_ids": knowledge_ids,
+        "prompt_version": ASSESSMENT_PROMPT_VERSION,
+        "assessment": record
+    })
+    note_assessment(org_id, cluster["id"], record)
     
     return assessment
 
 
+async def run_bulk_assessment(
+    job_id: str,
+    org_id: str,
+    upload_id: str = None,
+    cluster_ids: list[str] = None,
+    concurrency: int = None,
+    force_refresh: bool = False,
+    priority: LLMPriority = LLMPriority.BULK
+) -> None:
+    """
+    Assess every cluster of an upload (or the whole org) as a background job.
+    
+    1. Retrieve knowledge for all clusters in one batch (stored centroids as queries)
+    2. Skip clusters whose stored assessment is still valid
+    3. Generate the rest, at most `concurrency` LLM calls in flight
+    """
+    settings = get_settings()
+    db = get_database_service()
+    llm = get_llm_service()
+    semaphore = asyncio.Semaphore(concurrency or settings.ASSESSMENT_CONCURRENCY)
+    
+    with track_token_usage() as usage:
+        try:
+            clusters = await db.get_clusters(
+                org_id,
+                upload_id=upload_id,
+                columns=[*CLUSTER_COLUMNS, "centroid"],
+                cluster_ids=cluster_ids or None
+            )
+            
+            progress = {"total": len(clusters), "generated": 0, "skipped": 0, "failed": 0}
+            await db.update_job(job_id, status="running", progress=progress)
+            
+            # 1. Knowledge retrieval for all clusters in one batch
+            knowledge_sets = await retrieve_knowledge_for_clusters(org_id, clusters, limit=3, threshold=0.7)
+            
+            # 2/3. Reuse valid stored assessments, generate the rest
+            failures = []
+            
+            async def assess(cluster, knowledge):
+                async with semaphore:
+                    try:
+                        if not force_refresh and await db.get_cached_assessment(
+                            cluster_id=cluster["id"],
+                            org_id=org_id,
+                            knowledge_fingerprint=knowledge_fingerprint([k["id"] for k in knowledge]),
+                            prompt_version=ASSESSMENT_PROMPT_VERSION
+                        ):
+                            progress["skipped"] += 1
+                        else:
+                            # Stored assessment checked above; only a forced job regenerates LLM responses
+                            await assess_cluster(
+                                cluster, org_id, knowledge, llm,
+                                use_stored=False,
+                                refresh_llm_cache=force_refresh
+                            )
+                            progress["generated"] += 1
+                    except Exception as e:
+                        progress["failed"] += 1
+                        failures.append({"cluster_id": cluster["id"], "error": str(e)})
+                await db.update_job(job_id, progress=progress, token_usage=usage.to_dict())
+            
+            # Bulk work queues behind interactive assessments in the LLM scheduler
+            with llm_priority(priority):
+                await asyncio.gather(*(assess(c, k) for c, k in zip(clusters, knowledge_sets)))
+            
+            await db.update_job(
+                job_id,
+                status="completed" if not failures else "completed_with_errors",
+                progress=progress,
+                result={"failures": failures},
+                token_usage=usage.to_dict()
+            )
+        
+        except Exception as e:
+            await db.update_job(job_id, status="failed", result={"error": str(e)}, token_usage=usage.to_dict())
+            raise
+
+
+async def invalidate_assessments_for_knowledge(org_id: str, embedding: list[float]) -> list[str]:
+    """
+    Mark stored assessments stale for clusters whose centroid is close to newly
+    approved knowledge. Returns the affected cluster IDs, to be regenerated.
+    """
+    settings = get_settings()
+    db = get_database_service()
+    
+    clusters = await db.search_similar_clusters(
+        org_id=org_id,
+        embedding=embedding,
+        limit=settings.ASSESSMENT_INVALIDATION_MAX_CLUSTERS,
+        threshold=settings.ASSESSMENT_INVALIDATION_THRESHOLD
+    )
+    cluster_ids = [c["id"] for c in clusters]
+    await db.mark_assessments_stale(org_id, cluster_ids)
+    return cluster_ids
+
+
+def knowledge_fingerprint(knowledge_ids: list[str]) -> str:
+    """Order-independent hash of the knowledge entries an assessment was built from."""
+    return hashlib.sha256(",".join(sorted(knowledge_ids)).encode()).hexdigest()
+
+
 async def generate_grounded_assessment(
     cluster: dict,
     knowledge: list[dict],
@@ -58,19 +218,20 @@ async def generate_grounded_assessment(
 ) -> ClusterAssessment:
     """Generate assessment grounded in organizational knowledge."""
     
-    # Build context from knowledge
+    settings = get_settings()
+    
+    # Build context from knowledge (most similar first)
     context_parts = []
-    knowledge_ids = []
     for k in knowledge:
-        knowledge_ids.append(k["id"])
-        context_parts.append(f"""
-Category: {k.get('category', 'N/A')}
+        context_parts.append(f"""Category: {k.get('category', 'N/A')}
 Process: {k.get('current_process', 'N/A')}
 Automation Level: {k.get('automation_level', 'N/A')}
 Tools: {', '.join(k.get('tools_used', []))}
-Blockers: {k.get('blockers', 'None')}
-""")
+Blockers: {k.get('blockers', 'None')}""")
     
+    # Keep as much knowledge as fits the context budget; only cite what was sent
+    context_parts = fit_to_budget(context_parts, settings.LLM_ASSESSMENT_CONTEXT_TOKENS)
+    knowledge_ids = [k["id"] for k in knowledge[:len(context_parts)]]
     context = "\n---\n".join(context_parts)
     
     prompt = f"""Assess this ticket cluster for automation potential using the organizational knowledge provided.
@@ -104,20 +265,19 @@ Respond in this exact JSON format:
     ]
 }}"""
 
-    response = await llm.chat_json(prompt)
+    with llm_call_type("assessment"):
+        response = await chat_structured(llm, prompt, AssessmentOutput, max_tokens=settings.LLM_ASSESSMENT_MAX_TOKENS)
     
     return ClusterAssessment(
         cluster_id=cluster["id"],
         cluster_name=cluster.get("sme_name") or cluster.get("auto_name", "Unknown"),
         ticket_count=cluster.get("ticket_count", 0),
-        automation_potential=response.get("automation_potential", 50),
-        automation_level=response.get("automation_level", "semi_automatable"),
-        confidence=response.get("confidence", "medium"),
-        summary=response.get("summary", ""),
-        recommendation=response.get("recommendation", ""),
-        resolution_steps=[
-            ResolutionStep(**step) for step in response.get("resolution_steps", [])
-        ],
+        automation_potential=response.automation_potential,
+        automation_level=response.automation_level,
+        confidence=response.confidence,
+        summary=response.summary,
+        recommendation=response.recommendation,
+        resolution_steps=response.resolution_steps,
         source="knowledge_base",
         knowledge_ids=knowledge_ids,
         needs_sme_review=False
@@ -130,6 +290,7 @@ async def generate_generic_assessment(
     llm
 ) -> ClusterAssessment:
     """Generate generic assessment when no organizational knowledge exists."""
+    settings = get_settings()
     
     prompt = f"""Assess this ticket cluster for automation potential.
 
@@ -155,20 +316,19 @@ Respond in this exact JSON format:
     ]
 }}"""
 
-    response = await llm.chat_json(prompt)
+    with llm_call_type("assessment"):
+        response = await chat_structured(llm, prompt, AssessmentOutput, max_tokens=settings.LLM_ASSESSMENT_MAX_TOKENS)
     
     return ClusterAssessment(
         cluster_id=cluster["id"],
         cluster_name=cluster.get("sme_name") or cluster.get("auto_name", "Unknown"),
         ticket_count=cluster.get("ticket_count", 0),
-        automation_potential=response.get("automation_potential", 50),
-        automation_level=response.get("automation_level", "semi_automatable"),
+        automation_potential=response.automation_potential,
+        automation_level=response.automation_level,
         confidence="low",  # Always low for generic
-        summary=response.get("summary", ""),
-        recommendation=response.get("recommendation", "") + "\n\n⚠️ This is a generic assessment. Please provide organizational context for more accurate results.",
-        resolution_steps=[
-            ResolutionStep(**step) for step in response.get("resolution_steps", [])
-        ],
+        summary=response.summary,
+        recommendation=response.recommendation + "\n\n⚠️ This is a generic assessment. Please provide organizational context for more accurate results.",
+        resolution_steps=response.resolution_steps,
         source="llm_generic",
         knowledge_ids=[],
         needs_sme_review=True
@@ -0,0 +1,125 @@
+"""
+Classifier - Real-time ticket classification against cached cluster centroids.
+
+New tickets are tagged with their nearest cluster as they arrive: the org's
+cluster centroids sit in a row-normalized float32 matrix, so classifying a
+batch is one embedding call plus one matrix multiply. Each cluster carries a
+summary of its latest stored assessment. Indexes are cached per org (see
+org_cache) and dropped whenever clusters are (re)built.
+"""
+import asyncio
+import numpy as np
+
+from app.config import get_settings
+from app.services import get_database_service, get_embedding_service
+from app.services.org_cache import OrgCache
+from app.utils.helpers import parse_vector
+
+# Assessment fields returned with a classification
+_SUMMARY_FIELDS = ("summary", "automation_potential", "automation_level", "confidence", "generated_at")
+
+
+def summarize_assessment(assessment: dict) -> dict:
+    return {f: assessment.get(f) for f in _SUMMARY_FIELDS}
+
+
+class CentroidIndex:
+    """Row-normalized centroid matrix of an org's clusters, with assessment summaries."""
+
+    def __init__(self, clusters: list[dict], assessments: dict[str, dict] = None):
+        clusters = [c for c in clusters if c.get("centroid") is not None]
+        assessments = assessments or {}
+        self.clusters = [
+            {
+                "cluster_id": c["id"],
+                "cluster_name": c.get("sme_name") or c.get("auto_name"),
+                "upload_id": c.get("upload_id"),
+                "ticket_count": c.get("ticket_count", 0),
+            }
+            for c in clusters
+        ]
+        self.assessments = {c["cluster_id"]: assessments[c["cluster_id"]] for c in self.clusters if c["cluster_id"] in assessments}
+        self.upload_ids = np.array([c["upload_id"] for c in self.clusters], dtype=object)
+
+        if clusters:
+            matrix = np.ascontiguousarray([parse_vector(c["centroid"]) for c in clusters], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.matrix = matrix / np.maximum(norms, 1e-12)
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def classify(self, embeddings, upload_id: str = None, min_similarity: float = 0.0) -> list[dict]:
+        """Nearest cluster per query vector (None when nothing reaches min_similarity)."""
+        if not self.clusters:
+            return [None] * len(embeddings)
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self.matrix.T
+        if upload_id is not None:
+            scores[:, self.upload_ids != upload_id] = -np.inf
+
+        best = np.argmax(scores, axis=1)
+        results = []
+        for row, i in enumerate(best):
+            score = float(scores[row, i])
+            if score < min_similarity:
+                results.append(None)
+                continue
+            cluster = self.clusters[i]
+            results.append({
+                **cluster,
+                "similarity": score,
+                "assessment": self.assessments.get(cluster["cluster_id"]),
+            })
+        return results
+
+
+async def build_centroid_index(org_id: str) -> CentroidIndex:
+    db = get_database_service()
+    clusters, records = await asyncio.gather(
+        db.get_clusters(org_id, columns=["id", "upload_id", "auto_name", "sme_name", "ticket_count", "centroid"]),
+        db.get_latest_assessments(org_id)
+    )
+    assessments = {r["cluster_id"]: summarize_assessment(r["assessment"]) for r in records}
+    return CentroidIndex(clusters, assessments)
+
+
+_cache: OrgCache[CentroidIndex] = OrgCache(
+    build_centroid_index,
+    ttl_setting="CENTROID_INDEX_TTL_SECONDS",
+    max_orgs_setting="CENTROID_INDEX_MAX_ORGS"
+)
+
+
+async def get_centroid_index(org_id: str) -> CentroidIndex:
+    """Return the org's centroid index, loading it from the database on first use or after expiry."""
+    return await _cache.get(org_id)
+
+
+def invalidate_centroid_index(org_id: str) -> None:
+    """Drop an org's centroid index after its clusters changed."""
+    _cache.invalidate(org_id)
+
+
+def note_assessment(org_id: str, cluster_id: str, assessment: dict) -> None:
+    """Update the cached assessment summary of a cluster after a new assessment was stored."""
+    index = _cache.peek(org_id)
+    if index is not None:
+        index.assessments[cluster_id] = summarize_assessment(assessment)
+
+
+async def classify_tickets(org_id: str, descriptions: list[str], upload_id: str = None) -> list[dict]:
+    """Embed ticket descriptions and return the nearest cluster (with assessment summary) for each."""
+    if not descriptions:
+        return []
+    settings = get_settings()
+    # The encode runs in a worker thread, overlapping the index load
+    embeddings, index = await asyncio.gather(
+        get_embedding_service().embed_texts(descriptions),
+        get_centroid_index(org_id)
+    )
+    return index.classify(embeddings, upload_id=upload_id, min_similarity=settings.CLASSIFY_MIN_SIMILARITY)
@@ -1,12 +1,18 @@
 """
 Clustering service - Group similar tickets using sklearn clustering.
 """
+import asyncio
 import numpy as np
-from sklearn.cluster import AgglomerativeClustering
-from collections import Counter
+from sklearn.cluster import AgglomerativeClustering, DBSCAN, MiniBatchKMeans
 
 from app.config import get_settings
 from app.services import get_database_service, get_llm_service
+from app.services.llm import LLMPriority, llm_priority, llm_call_type, track_token_usage, fit_to_budget, truncate_to_tokens
+from app.services.keywords import extract_cluster_keywords, keywords_to_name
+from app.services.hierarchy import build_centroid_hierarchy, cut_hierarchy, invalidate_hierarchy
+from app.services.classifier import invalidate_centroid_index
+
+CLUSTERING_ENGINES = ("agglomerative", "kmeans", "dbscan")
 
 
 async def run_clustering(
@@ -14,83 +20,313 @@ async def run_clustering(
     org_id: str,
     ticket_ids: list[str],
     embeddings: list[list[float]],
-    descriptions: list[str]
+    descriptions: list[str],
+    naming_mode: str = None
 ):
     """
     Cluster tickets using Agglomerative Clustering and create cluster records.
     Using sklearn's AgglomerativeClustering as it doesn't require C++ build tools.
     """
+    db = get_database_service()
+
+    clusters, hierarchy = await build_clusters(
+        ticket_ids=ticket_ids,
+        embeddings=embeddings,
+        descriptions=descriptions,
+        naming_mode=naming_mode
+    )
+
+    # Create cluster records and ticket assignments in one transaction
+    created = await db.create_clusters(org_id, upload_id, clusters)
+    cluster_ids = {c["label"]: row["id"] for c, row in zip(clusters, created)}
+
+    await save_hierarchy(org_id, upload_id, hierarchy, cluster_ids)
+    invalidate_centroid_index(org_id)
+
+
+async def recluster(
+    job_id: str,
+    org_id: str,
+    upload_id: str = None,
+    engine: str = None,
+    n_clusters: int = None,
+    naming_mode: str = None,
+    eps: float = None
+):
+    """
+    Re-run clustering over embeddings already stored on the tickets.
+
+    Embeddings are streamed from the database in batches (nothing is re-parsed
+    or re-embedded) and the new cluster set atomically replaces the old one for
+    the upload, or for the whole org when upload_id is None.
+    """
     settings = get_settings()
     db = get_database_service()
-    llm = get_llm_service()
-    
+
+    with track_token_usage() as usage:
+        try:
+            await db.update_job(job_id, status="running", progress={"stage": "loading_embeddings", "loaded": 0})
+
+            # 1. Stream stored embeddings
+            ticket_ids, descriptions, batches = [], [], []
+            async for batch in db.iter_ticket_embeddings(
+                org_id=org_id,
+                upload_id=upload_id,
+                batch_size=settings.RECLUSTER_BATCH_SIZE
+            ):
+                ticket_ids.extend(t["id"] for t in batch)
+                descriptions.extend(t.get("description") or "" for t in batch)
+                batches.append(np.asarray([t["embedding"] for t in batch], dtype=np.float32))
+                await db.update_job(job_id, progress={"stage": "loading_embeddings", "loaded": len(ticket_ids)})
+
+            if not ticket_ids:
+                raise ValueError("No embedded tickets found to cluster")
+
+            # 2. Cluster
+            await db.update_job(job_id, progress={"stage": "clustering", "loaded": len(ticket_ids)})
+            clusters, hierarchy = await build_clusters(
+                ticket_ids=ticket_ids,
+                embeddings=np.vstack(batches),
+                descriptions=descriptions,
+                engine=engine,
+                n_clusters=n_clusters,
+                naming_mode=naming_mode,
+                eps=eps
+            )
+
+            # 3. Swap the cluster set in one transaction
+            await db.update_job(job_id, progress={"stage": "saving", "loaded": len(ticket_ids)})
+            created = await db.replace_clusters(org_id, upload_id, clusters)
+            cluster_ids = {c["label"]: row["id"] for c, row in zip(clusters, created)}
+            await save_hierarchy(org_id, upload_id, hierarchy, cluster_ids)
+            invalidate_centroid_index(org_id)
+
+            await db.update_job(
+                job_id,
+                status="completed",
+                progress={"stage": "done", "loaded": len(ticket_ids)},
+                result={"cluster_count": len(clusters), "ticket_count": len(ticket_ids)},
+                token_usage=usage.to_dict()
+            )
+
+        except Exception as e:
+            await db.update_job(job_id, status="failed", result={"error": str(e)}, token_usage=usage.to_dict())
+            raise
+
+
+async def build_clusters(
+    ticket_ids: list[str],
+    embeddings,
+    descriptions: list[str],
+    engine: str = None,
+    n_clusters: int = None,
+    naming_mode: str = None,
+    eps: float = None
+) -> tuple[list[dict], dict]:
+    """
+    Cluster embeddings and name the clusters, without persisting anything.
+
+    Tickets are first split into CLUSTERING_HIERARCHY_LEAVES leaf sub-clusters
+    by the chosen engine; a Ward merge tree over the leaves is then cut at
+    n_clusters (default: sqrt of samples, min 2, max 50). With the
+    agglomerative engine this equals a direct Ward clustering.
+    Clusters are named from their most central tickets plus c-TF-IDF keywords;
+    naming_mode "keywords" skips the LLM entirely (fast previews, air-gapped runs).
+
+    Returns:
+        (clusters, hierarchy): cluster dicts ready for insertion (plus "label"
+        and "ticket_ids"), and the merge tree for save_hierarchy
+    """
+    settings = get_settings()
+    engine = engine or settings.CLUSTERING_ENGINE
+    naming_mode = naming_mode or settings.CLUSTER_NAMING_MODE
+    llm = get_llm_service() if naming_mode == "llm" else None
+
     # Convert to numpy array
-    embeddings_array = np.array(embeddings)
-    
+    embeddings_array = np.asarray(embeddings, dtype=np.float64)
+
     # Determine number of clusters (heuristic: sqrt of samples, min 2, max 50)
     n_samples = len(embeddings_array)
-    n_clusters = max(2, min(50, int(np.sqrt(n_samples))))
-    
-    # Run Agglomerative Clustering
-    clusterer = AgglomerativeClustering(
-        n_clusters=n_clusters,
-        metric='euclidean',
-        linkage='ward'
+    target_clusters = n_clusters or max(2, min(50, int(np.sqrt(n_samples))))
+
+    # Cluster into fine leaf sub-clusters (CPU-bound, keep it off the event loop)
+    n_leaves = min(n_samples, max(target_clusters, settings.CLUSTERING_HIERARCHY_LEAVES))
+    leaf_labels = await asyncio.to_thread(
+        fit_leaf_clusters,
+        embeddings_array,
+        engine,
+        n_leaves,
+        eps or settings.CLUSTERING_DBSCAN_EPS,
+        settings.CLUSTERING_MIN_SAMPLES
     )
-    cluster_labels = clusterer.fit_predict(embeddings_array)
-    
-    # Group tickets by cluster
+    clustered = leaf_labels >= 0  # DBSCAN marks noise as -1
+
+    # Renumber leaves 0..n-1, dropping any empty ones (e.g. unused k-means centers)
+    present, leaf_labels[clustered] = np.unique(leaf_labels[clustered], return_inverse=True)
+    n_leaves = len(present)
+    if n_leaves == 0:
+        raise ValueError("Clustering produced no clusters (check eps/min_samples)")
+
+    leaf_counts = np.bincount(leaf_labels[clustered], minlength=n_leaves)
+    leaf_centroids = np.zeros((n_leaves, embeddings_array.shape[1]))
+    np.add.at(leaf_centroids, leaf_labels[clustered], embeddings_array[clustered])
+    leaf_centroids /= np.maximum(leaf_counts, 1)[:, None]
+
+    # Merge tree over the leaves; density clusters are kept as found by default
+    merges = build_centroid_hierarchy(leaf_centroids, leaf_counts)
+    if engine == "dbscan" and not n_clusters:
+        target_clusters = n_leaves
+    leaf_groups = cut_hierarchy(merges, n_leaves, target_clusters)
+    cluster_labels = np.full(n_samples, -1)
+    cluster_labels[clustered] = leaf_groups[leaf_labels[clustered]]
+
+    # Group ticket indices by cluster
     cluster_groups = {}
     for idx, label in enumerate(cluster_labels):
         if label == -1:  # Noise points
             continue
-        if label not in cluster_groups:
-            cluster_groups[label] = {
-                "ticket_ids": [],
-                "embeddings": [],
-                "descriptions": []
-            }
-        cluster_groups[label]["ticket_ids"].append(ticket_ids[idx])
-        cluster_groups[label]["embeddings"].append(embeddings[idx])
-        cluster_groups[label]["descriptions"].append(descriptions[idx])
-    
-    # Create cluster records
-    for label, group in cluster_groups.items():
+        cluster_groups.setdefault(int(label), []).append(idx)
+
+    # Distinctive keywords for all clusters (and leaf sub-clusters) in one sparse pass each
+    cluster_keywords = extract_cluster_keywords(
+        descriptions,
+        cluster_labels,
+        top_n=settings.CLUSTER_KEYWORDS_TOP_N
+    )
+    leaf_keywords = extract_cluster_keywords(
+        descriptions,
+        leaf_labels,
+        top_n=settings.CLUSTER_KEYWORDS_TOP_N
+    )
+
+    clusters = []
+    for label, indices in cluster_groups.items():
+        group_embeddings = embeddings_array[indices]
+        keywords = cluster_keywords.get(label, [])
+
         # Calculate centroid
-        centroid = np.mean(group["embeddings"], axis=0).tolist()
-        
-        # Get sample descriptions for naming
-        sample_descriptions = group["descriptions"][:10]
-        
-        # Generate cluster name using LLM
-        cluster_name = await generate_cluster_name(llm, sample_descriptions)
-        
-        # Create cluster
-        cluster = await db.create_cluster({
-            "org_id": org_id,
-            "upload_id": upload_id,
+        centroid = group_embeddings.mean(axis=0)
+
+        # Most representative tickets: nearest to the centroid
+        exemplar_positions = select_exemplars(
+            group_embeddings,
+            centroid,
+            k=settings.CLUSTER_NAMING_EXEMPLARS
+        )
+        sample_descriptions = [descriptions[indices[p]] for p in exemplar_positions]
+
+        # Generate cluster name (LLM, or keywords only); naming yields to interactive calls
+        if llm is None:
+            cluster_name = keywords_to_name(keywords)
+        else:
+            with llm_priority(LLMPriority.BACKGROUND):
+                cluster_name = await generate_cluster_name(llm, sample_descriptions, keywords)
+
+        summary = f"Cluster of {len(indices)} similar tickets"
+        if keywords:
+            summary += f". Key terms: {', '.join(keywords[:5])}"
+
+        clusters.append({
+            "label": label,
             "auto_name": cluster_name,
-            "summary": f"Cluster of {len(group['ticket_ids'])} similar tickets",
-            "ticket_count": len(group["ticket_ids"]),
-            "centroid": centroid
+            "summary": summary,
+            "ticket_count": len(indices),
+            "centroid": centroid.tolist(),
+            "ticket_ids": [ticket_ids[i] for i in indices]
         })
-        
-        # Assign tickets to cluster
-        await db.assign_tickets_to_cluster(cluster["id"], group["ticket_ids"])
 
+    hierarchy = {
+        "n_leaves": n_leaves,
+        "default_n_clusters": min(target_clusters, n_leaves),
+        "merges": merges.tolist(),
+        "leaf_counts": leaf_counts.tolist(),
+        "leaf_centroids": leaf_centroids.tolist(),
+        "leaf_keywords": [leaf_keywords.get(leaf, []) for leaf in range(n_leaves)],
+        "leaf_groups": leaf_groups.tolist()
+    }
 
-async def generate_cluster_name(llm, descriptions: list[str]) -> str:
+    return clusters, hierarchy
+
+
+def fit_leaf_clusters(
+    embeddings: np.ndarray,
+    engine: str,
+    n_leaves: int,
+    eps: float,
+    min_samples: int
+) -> np.ndarray:
+    """Split embeddings into leaf sub-clusters with the chosen engine (-1 = noise)."""
+    if engine == "agglomerative":
+        # O(n^2) memory - prefer "kmeans" for very large orgs
+        clusterer = AgglomerativeClustering(
+            n_clusters=n_leaves,
+            metric='euclidean',
+            linkage='ward'
+        )
+    elif engine == "kmeans":
+        clusterer = MiniBatchKMeans(
+            n_clusters=n_leaves,
+            batch_size=4096,
+            n_init=3,
+            random_state=0
+        )
+    elif engine == "dbscan":
+        clusterer = DBSCAN(eps=eps, min_samples=min_samples, metric="cosine")
+    else:
+        raise ValueError(f"Unknown clustering engine: {engine}")
+
+    return np.asarray(clusterer.fit_predict(embeddings))
+
+
+async def save_hierarchy(org_id: str, upload_id: str, hierarchy: dict, cluster_ids: dict) -> None:
+    """Persist the merge tree, mapping each leaf to the stored cluster it belongs to."""
+    db = get_database_service()
+    leaf_groups = hierarchy.pop("leaf_groups")
+
+    await db.save_cluster_hierarchy({
+        "org_id": org_id,
+        "upload_id": upload_id,
+        **hierarchy,
+        "leaf_cluster_ids": [cluster_ids.get(group) for group in leaf_groups]
+    })
+    invalidate_hierarchy(org_id, upload_id)
+
+
+def select_exemplars(embeddings: np.ndarray, centroid: np.ndarray, k: int = 10) -> list[int]:
+    """Return positions of the k embeddings closest (cosine) to the centroid, nearest first."""
+    if len(embeddings) == 0:
+        return []
+
+    norms = np.linalg.norm(embeddings, axis=1) * (np.linalg.norm(centroid) or 1.0)
+    norms[norms == 0] = 1.0
+    similarity = (embeddings @ centroid) / norms
+
+    k = min(k, len(similarity))
+    nearest = np.argpartition(-similarity, k - 1)[:k]
+    return nearest[np.argsort(-similarity[nearest])].tolist()
+
+
+async def generate_cluster_name(llm, descriptions: list[str], keywords: list[str] = None) -> str:
     """Generate a descriptive name for a cluster using LLM."""
-    sample_text = "\n".join([f"- {d[:200]}" for d in descriptions[:10]])
+    settings = get_settings()
     
-    prompt = f"""Based on these sample ticket descriptions, generate a short, descriptive name for this cluster (max 5 words):
+    # Exemplars arrive most central first; keep as many as fit the token budget
+    snippets = [
+        f"- {truncate_to_tokens(' '.join(d.split()), settings.LLM_NAMING_SNIPPET_TOKENS)}"
+        for d in descriptions
+    ]
+    sample_text = "\n".join(fit_to_budget(snippets, settings.LLM_NAMING_PROMPT_TOKENS))
+    keyword_text = f"\nDistinctive keywords: {', '.join(keywords)}\n" if keywords else ""
 
-{sample_text}
+    prompt = f"""Based on these representative ticket descriptions, generate a short, descriptive name for this cluster (max 5 words):
 
+{sample_text}
+{keyword_text}
 Respond with ONLY the cluster name, nothing else."""
 
     try:
-        name = await llm.chat(prompt, temperature=0.0, max_tokens=50)
+        with llm_call_type("cluster_naming"):
+            name = await llm.chat(prompt, temperature=0.0, max_tokens=settings.LLM_NAMING_MAX_TOKENS)
         return name.strip().strip('"').strip("'")
     except Exception:
-        return "Uncategorized Issues"
+        return keywords_to_name(keywords or [])
@@ -1,17 +1,51 @@
 # Database service - Swappable database implementations
 from .base import DatabaseService
 from .supabase import SupabaseDatabaseService
+from .postgres import PostgresDatabaseService
 from app.config import get_settings
 
+# Singleton instance (holds the client / connection pool)
+_database_service: DatabaseService = None
+
 
 def get_database_service() -> DatabaseService:
     """Factory function to get the configured database service."""
-    settings = get_settings()
-    # Currently only Supabase, but easy to add PostgreSQL, etc.
-    return SupabaseDatabaseService(
-        url=settings.SUPABASE_URL,
-        key=settings.SUPABASE_KEY
-    )
+    global _database_service
+    
+    if _database_service is None:
+        settings = get_settings()
+        
+        if settings.DATABASE_PROVIDER == "postgres":
+            # Direct asyncpg connection pool to Postgres + pgvector
+            _database_service = PostgresDatabaseService(
+                dsn=settings.DATABASE_URL,
+                ef_search=settings.VECTOR_SEARCH_EF_SEARCH,
+                min_pool_size=settings.DATABASE_POOL_MIN_SIZE,
+                max_pool_size=settings.DATABASE_POOL_MAX_SIZE,
+                statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE
+            )
+        else:
+            _database_service = SupabaseDatabaseService(
+                url=settings.SUPABASE_URL,
+                key=settings.SUPABASE_KEY,
+                ef_search=settings.VECTOR_SEARCH_EF_SEARCH
+            )
+    
+    return _database_service
+
+
+async def init_database_service() -> None:
+    """Open the database service's connection pool (app startup)."""
+    await get_database_service().connect()
+
+
+async def close_database_service() -> None:
+    """Close the database service's connection pool (app shutdown)."""
+    global _database_service
+    
+    if _database_service is not None:
+        await _database_service.close()
+        _database_service = None
 
 
-__all__ = ["DatabaseService", "get_database_service"]
+__all__ = ["DatabaseService", "get_database_service", "init_database_service", "close_database_service"]
@@ -3,12 +3,44 @@ Abstract base class for database operations.
 All database implementations must follow this interface.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+# Default column projections for list queries: everything except vectors and raw source rows
+CLUSTER_COLUMNS = ("id", "org_id", "upload_id", "auto_name", "sme_name", "summary", "ticket_count", "created_at")
+TICKET_COLUMNS = (
+    "id", "org_id", "upload_id", "ticket_id", "description",
+    "category", "subcategory", "priority", "created_at",
+)
+KNOWLEDGE_COLUMNS = (
+    "id", "org_id", "cluster_id", "category", "subcategory", "current_process",
+    "automation_level", "tools_used", "blockers", "resolution_steps", "status",
+    "submitted_by", "approved_by", "approved_at", "rejection_reason", "created_at", "updated_at",
+)
+
+# Keyset pagination sort keys (list order; cursors carry these values of a page's last row)
+CLUSTER_SORT_KEYS = ("ticket_count", "id")  # ticket_count DESC, id ASC
+TICKET_SORT_KEYS = ("created_at", "id")  # ASC
+KNOWLEDGE_SORT_KEYS = ("created_at", "id")  # DESC
+
+
+
+def select_columns(columns: Optional[list[str]], default: tuple[str, ...], sort_keys: tuple[str, ...]) -> list[str]:
+    """Requested (or default) columns plus the sort keys needed for the next cursor."""
+    return list(dict.fromkeys([*(columns or default), *sort_keys]))
 
 
 class DatabaseService(ABC):
     """Abstract database service interface."""
     
+    async def connect(self) -> None:
+        """Open pooled connections (app startup). No-op for stateless clients."""
+        pass
+    
+    async def close(self) -> None:
+        """Close pooled connections (app shutdown)."""
+        pass
+    
     # ==================== Organizations ====================
     @abstractmethod
     async def create_organization(self, name: str, settings: dict = None) -> dict:
@@ -50,8 +82,8 @@ class DatabaseService(ABC):
         pass
     
     @abstractmethod
-    async def update_upload_status(self, upload_id: str, status: str, row_count: int = None) -> None:
-        """Update upload status."""
+    async def update_upload_status(self, upload_id: str, status: str, row_count: int = None, token_usage: dict = None) -> None:
+        """Update upload status (and the LLM token usage of its processing)."""
         pass
     
     @abstractmethod
@@ -66,13 +98,47 @@ class DatabaseService(ABC):
         pass
     
     @abstractmethod
-    async def get_tickets_by_upload(self, upload_id: str, org_id: str) -> list[dict]:
-        """Get all tickets for an upload."""
+    async def load_tickets(self, batches: AsyncIterable[list[dict]]) -> int:
+        """Stream ticket batches into the database as they are produced; returns the row count."""
+        pass
+    
+    @abstractmethod
+    async def get_tickets_by_upload(
+        self,
+        upload_id: str,
+        org_id: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        """
+        Get tickets of an upload, oldest first (TICKET_COLUMNS unless columns is given).
+        Pages of `limit` rows follow `cursor` (see TICKET_SORT_KEYS).
+        """
+        pass
+    
+    @abstractmethod
+    def iter_ticket_embeddings(self, org_id: str, upload_id: str = None, batch_size: int = 2000) -> AsyncIterator[list[dict]]:
+        """Stream embedded tickets (id, description, embedding) in batches, for the upload or whole org."""
         pass
     
     @abstractmethod
-    async def update_ticket_embeddings(self, ticket_ids: list[str], embeddings: list[list[float]]) -> None:
-        """Update embeddings for tickets."""
+    async def get_ticket(self, ticket_id: str, org_id: str) -> Optional[dict]:
+        """Get ticket by ID (without its embedding)."""
+        pass
+    
+    @abstractmethod
+    async def search_similar_tickets(
+        self,
+        org_id: str,
+        ticket_id: str,
+        limit: int = 10,
+        upload_id: str = None,
+        category: str = None,
+        created_after: datetime = None,
+        created_before: datetime = None
+    ) -> list[dict]:
+        """Nearest-neighbour tickets of a ticket within the org, optionally filtered."""
         pass
     
     # ==================== Clusters ====================
@@ -82,8 +148,19 @@ class DatabaseService(ABC):
         pass
     
     @abstractmethod
-    async def get_clusters(self, org_id: str, upload_id: str = None) -> list[dict]:
-        """Get clusters for an organization."""
+    async def get_clusters(
+        self,
+        org_id: str,
+        upload_id: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None,
+        cluster_ids: list[str] = None
+    ) -> list[dict]:
+        """
+        Get clusters for an organization, largest first (CLUSTER_COLUMNS unless columns is given),
+        optionally only those in cluster_ids. Pages of `limit` rows follow `cursor` (see CLUSTER_SORT_KEYS).
+        """
         pass
     
     @abstractmethod
@@ -92,8 +169,34 @@ class DatabaseService(ABC):
         pass
     
     @abstractmethod
-    async def assign_tickets_to_cluster(self, cluster_id: str, ticket_ids: list[str]) -> None:
-        """Assign tickets to a cluster."""
+    async def create_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        """
+        Create many clusters with their ticket memberships in one transaction.
+        Each cluster dict carries its "ticket_ids". Returns created clusters in input order.
+        """
+        pass
+    
+    @abstractmethod
+    async def search_similar_clusters(self, org_id: str, embedding: list[float], limit: int = 50, threshold: float = 0.5) -> list[dict]:
+        """Find clusters whose centroid is similar to an embedding."""
+        pass
+    
+    @abstractmethod
+    async def replace_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        """
+        Atomically replace the cluster set of an upload (whole org if upload_id is None),
+        dropping the cluster hierarchies of the same scope. Each cluster dict carries its "ticket_ids". Returns created clusters in input order.
+        """
+        pass
+    
+    @abstractmethod
+    async def save_cluster_hierarchy(self, hierarchy: dict) -> dict:
+        """Store the merge tree for an upload's clusters (replaces any previous one)."""
+        pass
+    
+    @abstractmethod
+    async def get_cluster_hierarchy(self, org_id: str, upload_id: str) -> Optional[dict]:
+        """Get the stored merge tree for an upload's clusters."""
         pass
     
     # ==================== Knowledge Base ====================
@@ -103,13 +206,62 @@ class DatabaseService(ABC):
         pass
     
     @abstractmethod
-    async def get_knowledge_entries(self, org_id: str, status: str = None) -> list[dict]:
-        """Get knowledge entries for an organization."""
+    async def get_knowledge_entries(
+        self,
+        org_id: str,
+        status: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        """
+        Get knowledge entries for an organization, newest first (KNOWLEDGE_COLUMNS unless columns is given).
+        Pages of `limit` rows follow `cursor` (see KNOWLEDGE_SORT_KEYS).
+        """
+        pass
+    
+    @abstractmethod
+    async def get_knowledge_entry(self, entry_id: str, org_id: str) -> Optional[dict]:
+        """Get a knowledge entry by ID."""
+        pass
+    
+    @abstractmethod
+    async def list_knowledge_by_submitter(
+        self,
+        org_id: str,
+        submitted_by: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        """Knowledge entries submitted by a user, newest first (paged like get_knowledge_entries)."""
+        pass
+    
+    @abstractmethod
+    async def list_knowledge_by_status(
+        self,
+        org_id: str,
+        statuses: list[str],
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        """Knowledge entries in any of the given statuses, newest first (paged like get_knowledge_entries)."""
         pass
     
     @abstractmethod
-    async def update_knowledge_status(self, entry_id: str, status: str, approved_by: str = None, rejection_reason: str = None) -> None:
-        """Update knowledge entry status (approve/reject)."""
+    async def count_knowledge_by_status(self, org_id: str) -> dict[str, int]:
+        """Number of knowledge entries per status ({"pending": 3, "approved": 10, ...})."""
+        pass
+    
+    @abstractmethod
+    async def update_knowledge_status(self, entry_id: str, status: str, approved_by: str = None, rejection_reason: str = None, embedding: list[float] = None) -> None:
+        """Update knowledge entry status (approve/reject), storing its embedding on approval."""
+        pass
+    
+    @abstractmethod
+    async def get_knowledge_embeddings(self, org_id: str) -> list[dict]:
+        """Get approved knowledge entries with their embeddings (for the in-process index)."""
         pass
     
     @abstractmethod
@@ -117,8 +269,65 @@ class DatabaseService(ABC):
         """Search for similar knowledge entries using vector similarity."""
         pass
     
+    @abstractmethod
+    async def search_similar_knowledge_batch(self, org_id: str, embeddings: list[list[float]], limit: int = 3, threshold: float = 0.7) -> list[list[dict]]:
+        """Search similar knowledge for many query vectors in one call (one result list per query)."""
+        pass
+    
+    # ==================== Assessments ====================
+    @abstractmethod
+    async def get_cached_assessment(self, cluster_id: str, org_id: str, knowledge_fingerprint: str, prompt_version: str) -> Optional[dict]:
+        """Get the stored (non-stale) assessment for a cluster, knowledge set and prompt version."""
+        pass
+    
+    @abstractmethod
+    async def save_cached_assessment(self, record: dict) -> None:
+        """Insert or replace a stored assessment (keyed by cluster, knowledge fingerprint, prompt version)."""
+        pass
+    
+    @abstractmethod
+    async def mark_assessments_stale(self, org_id: str, cluster_ids: list[str]) -> None:
+        """Flag stored assessments of these clusters for regeneration."""
+        pass
+    
+    @abstractmethod
+    async def get_latest_assessments(self, org_id: str, cluster_id: str = None) -> list[dict]:
+        """Latest stored assessment per cluster (or of one cluster), fresh ones preferred ([{cluster_id, assessment, stale, updated_at}])."""
+        pass
+    
+    # ==================== Jobs ====================
+    @abstractmethod
+    async def create_job(self, org_id: str, job_type: str, upload_id: str = None, params: dict = None) -> dict:
+        """Create a background job record."""
+        pass
+    
+    @abstractmethod
+    async def update_job(self, job_id: str, status: str = None, progress: dict = None, result: dict = None, token_usage: dict = None) -> None:
+        """Update job status, progress, result and/or LLM token usage."""
+        pass
+    
+    @abstractmethod
+    async def get_job(self, job_id: str, org_id: str) -> Optional[dict]:
+        """Get job by ID."""
+        pass
+    
+    @abstractmethod
+    async def get_token_usage(self, org_id: str, limit: int = 50) -> dict:
+        """LLM token usage summed in the database ({"totals", "by_call_type", "by_upload", "jobs"}; `limit` newest jobs)."""
+        pass
+    
+    @abstractmethod
+    async def get_analytics_dashboard(self, org_id: str, limit: int = 10) -> dict:
+        """Dashboard aggregates computed in the database (see get_analytics_dashboard in schema.sql)."""
+        pass
+    
+    @abstractmethod
+    async def get_cluster_categories(self, org_id: str) -> list[dict]:
+        """Cluster and ticket counts per cluster name, largest first ([{name, cluster_count, ticket_count}])."""
+        pass
+    
     # ==================== Audit Logs ====================
     @abstractmethod
-    async def create_audit_log(self, knowledge_id: str, action: str, actor_id: str, details: dict = None) -> None:
+    async def create_audit_log(self, org_id: str, knowledge_id: str, action: str, actor_id: str, details: dict = None) -> None:
         """Create an audit log entry."""
         pass
@@ -0,0 +1,624 @@
+"""
+PostgreSQL implementation of the database service.
+Talks to Postgres + pgvector directly over asyncpg: queries run on a
+process-wide connection pool without blocking the event loop, vectors and
+JSONB travel in binary, and asyncpg's per-connection statement cache
+prepares each (constant) query once per connection.
+"""
+import asyncio
+import json
+import re
+import struct
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Optional
+
+import asyncpg
+import numpy as np
+
+from .base import (
+    DatabaseService, CLUSTER_COLUMNS, TICKET_COLUMNS, KNOWLEDGE_COLUMNS,
+    CLUSTER_SORT_KEYS, TICKET_SORT_KEYS, KNOWLEDGE_SORT_KEYS, select_columns,
+)
+from app.utils.helpers import decode_cursor
+
+_TIMESTAMP_COLUMNS = {"created_at", "updated_at", "approved_at"}
+
+# Columns written by the COPY load path (extra keys on a ticket dict are ignored)
+_TICKET_LOAD_COLUMNS = (
+    "id", "org_id", "upload_id", "ticket_id", "description", "category",
+    "subcategory", "priority", "raw_data", "embedding", "created_at",
+)
+
+_KNOWLEDGE_RESULT_COLUMNS = (
+    "id, org_id, category, subcategory, current_process, "
+    "automation_level, tools_used, blockers, resolution_steps"
+)
+
+
+def _encode_vector(value) -> bytes:
+    """pgvector binary format: dimension (int16), unused (int16), float32 values."""
+    array = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", array.shape[0], 0) + array.tobytes()
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    dim = struct.unpack_from(">H", data)[0]
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).tolist()
+
+
+def _encode_jsonb(value) -> bytes:
+    """JSONB binary format: version byte 1 followed by the JSON text (NaN/Infinity are invalid JSONB)."""
+    return b"\x01" + json.dumps(value, default=str, allow_nan=False).encode()
+
+
+def _decode_jsonb(data: bytes):
+    return json.loads(data[1:])
+
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _projection(columns: list[str], default: tuple[str, ...], sort_keys: tuple[str, ...]) -> str:
+    """SELECT list for a list query (column names are interpolated, so validate them)."""
+    selected = select_columns(columns, default, sort_keys)
+    for column in selected:
+        if not _IDENTIFIER.match(column):
+            raise ValueError(f"Invalid column name: {column}")
+    return ", ".join(selected)
+
+
+def _row(record) -> Optional[dict]:
+    """Record -> dict with ids as strings, matching what the Supabase client returns."""
+    if record is None:
+        return None
+    return {k: str(v) if isinstance(v, uuid.UUID) else v for k, v in record.items()}
+
+
+def _value(column: str, value):
+    """Coerce ISO timestamp strings (as built for the REST API) for asyncpg."""
+    if column in _TIMESTAMP_COLUMNS and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class PostgresDatabaseService(DatabaseService):
+    """asyncpg database service implementation."""
+
+    def __init__(
+        self,
+        dsn: str,
+        ef_search: int = 40,
+        min_pool_size: int = 2,
+        max_pool_size: int = 10,
+        statement_cache_size: int = 100
+    ):
+        self.dsn = dsn
+        self.ef_search = ef_search  # HNSW candidate list size for vector searches
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        self.statement_cache_size = statement_cache_size  # 0 behind PgBouncer in transaction mode
+        self.pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection) -> None:
+        """Register binary codecs for pgvector and JSONB on every new connection."""
+        schema = await conn.fetchval(
+            "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace WHERE t.typname = 'vector'"
+        )
+        if schema:
+            await conn.set_type_codec(
+                "vector", schema=schema, encoder=_encode_vector, decoder=_decode_vector, format="binary"
+            )
+        await conn.set_type_codec(
+            "jsonb", schema="pg_catalog", encoder=_encode_jsonb, decoder=_decode_jsonb, format="binary"
+        )
+
+    async def connect(self) -> None:
+        await self._get_pool()
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        """Return the pool, creating it on first use."""
+        if self.pool is None:
+            async with self._pool_lock:
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_pool_size,
+                        max_size=self.max_pool_size,
+                        statement_cache_size=self.statement_cache_size,
+                        init=self._init_connection
+                    )
+        return self.pool
+
+    async def _fetch(self, query: str, *args) -> list[dict]:
+        pool = await self._get_pool()
+        return [_row(r) for r in await pool.fetch(query, *args)]
+
+    async def _fetchrow(self, query: str, *args) -> Optional[dict]:
+        pool = await self._get_pool()
+        return _row(await pool.fetchrow(query, *args))
+
+    async def _execute(self, query: str, *args) -> None:
+        pool = await self._get_pool()
+        await pool.execute(query, *args)
+
+    async def _insert(self, table: str, data: dict) -> dict:
+        columns = list(data)
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        return await self._fetchrow(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) RETURNING *",
+            *(_value(c, data[c]) for c in columns)
+        )
+
+    async def _update(self, table: str, row_id: str, data: dict) -> None:
+        columns = list(data)
+        assignments = ", ".join(f"{c} = ${i}" for i, c in enumerate(columns, start=2))
+        await self._execute(
+            f"UPDATE {table} SET {assignments} WHERE id = $1",
+            row_id, *(_value(c, data[c]) for c in columns)
+        )
+
+    # ==================== Organizations ====================
+    async def create_organization(self, name: str, settings: dict = None) -> dict:
+        return await self._insert("organizations", {"name": name, "settings": settings or {}})
+
+    async def get_organization(self, org_id: str) -> Optional[dict]:
+        return await self._fetchrow("SELECT * FROM organizations WHERE id = $1", org_id)
+
+    # ==================== Users ====================
+    async def create_user(self, org_id: str, email: str, role: str, password_hash: str) -> dict:
+        return await self._insert("users", {
+            "org_id": org_id,
+            "email": email,
+            "role": role,
+            "password_hash": password_hash
+        })
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        return await self._fetchrow("SELECT * FROM users WHERE email = $1", email)
+
+    # ==================== Schema Mappings ====================
+    async def save_schema_mapping(self, org_id: str, mappings: list[dict]) -> None:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.execute("DELETE FROM schema_mappings WHERE org_id = $1", org_id)
+            await conn.executemany(
+                "INSERT INTO schema_mappings (org_id, source_column, canonical_field, transform) VALUES ($1, $2, $3, $4)",
+                [(org_id, m["source_column"], m["canonical_field"], m.get("transform")) for m in mappings]
+            )
+
+    async def get_schema_mapping(self, org_id: str) -> list[dict]:
+        return await self._fetch("SELECT * FROM schema_mappings WHERE org_id = $1", org_id)
+
+    # ==================== Uploads ====================
+    async def create_upload(self, org_id: str, filename: str, row_count: int = 0) -> dict:
+        return await self._insert("uploads", {
+            "org_id": org_id,
+            "filename": filename,
+            "row_count": row_count,
+            "status": "processing"
+        })
+
+    async def update_upload_status(self, upload_id: str, status: str, row_count: int = None, token_usage: dict = None) -> None:
+        update_data = {"status": status}
+        if row_count is not None:
+            update_data["row_count"] = row_count
+        if token_usage is not None:
+            update_data["token_usage"] = token_usage
+        await self._update("uploads", upload_id, update_data)
+
+    async def get_upload(self, upload_id: str, org_id: str) -> Optional[dict]:
+        return await self._fetchrow("SELECT * FROM uploads WHERE id = $1 AND org_id = $2", upload_id, org_id)
+
+    # ==================== Tickets ====================
+    async def insert_tickets(self, tickets: list[dict]) -> None:
+        if not tickets:
+            return
+        columns = sorted({c for t in tickets for c in t})
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.executemany(
+                f"INSERT INTO tickets ({', '.join(columns)}) VALUES ({placeholders})",
+                [tuple(_value(c, t.get(c)) for c in columns) for t in tickets]
+            )
+
+    async def load_tickets(self, batches: AsyncIterable[list[dict]]) -> int:
+        """
+        Binary COPY each batch into the unlogged tickets_staging table, merge it
+        into tickets with INSERT ... SELECT and clear it, in one short
+        transaction per batch. A connection is only held while a batch is
+        written, never while the next one is produced (e.g. embedded), and each
+        batch is visible once committed. A failed load keeps the batches
+        committed before it.
+        """
+        columns = ", ".join(_TICKET_LOAD_COLUMNS)
+        select_list = ", ".join("COALESCE(created_at, NOW())" if c == "created_at" else c for c in _TICKET_LOAD_COLUMNS)
+        count = 0
+        pool = await self._get_pool()
+        async for batch in batches:
+            load_id = str(uuid.uuid4())
+            async with pool.acquire() as conn, conn.transaction():
+                await conn.copy_records_to_table(
+                    "tickets_staging",
+                    columns=["load_id", *_TICKET_LOAD_COLUMNS],
+                    records=[(load_id, *(_value(c, t.get(c)) for c in _TICKET_LOAD_COLUMNS)) for t in batch]
+                )
+                await conn.execute(
+                    f"""
+                    INSERT INTO tickets ({columns})
+                    SELECT {select_list}
+                    FROM tickets_staging WHERE load_id = $1
+                    ON CONFLICT (id) DO NOTHING
+                    """,
+                    load_id
+                )
+                await conn.execute("DELETE FROM tickets_staging WHERE load_id = $1", load_id)
+            count += len(batch)
+        return count
+
+    async def get_tickets_by_upload(
+        self,
+        upload_id: str,
+        org_id: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        after = decode_cursor(cursor, TICKET_SORT_KEYS) if cursor else {"created_at": None, "id": None}
+        return await self._fetch(
+            f"""
+            SELECT {_projection(columns, TICKET_COLUMNS, TICKET_SORT_KEYS)} FROM tickets
+            WHERE upload_id = $1 AND org_id = $2
+              AND ($3::timestamptz IS NULL OR (created_at, id) > ($3, $4::uuid))
+            ORDER BY created_at, id
+            LIMIT $5
+            """,
+            upload_id, org_id, _value("created_at", after["created_at"]), after["id"], limit
+        )
+
+    async def iter_ticket_embeddings(self, org_id: str, upload_id: str = None, batch_size: int = 2000) -> AsyncIterator[list[dict]]:
+        # Keyset pagination on id keeps every page an index range scan
+        last_id = None
+        while True:
+            rows = await self._fetch(
+                """
+                SELECT id, description, embedding FROM tickets
+                WHERE org_id = $1
+                  AND embedding IS NOT NULL
+                  AND ($2::uuid IS NULL OR upload_id = $2)
+                  AND ($3::uuid IS NULL OR id > $3)
+                ORDER BY id
+                LIMIT $4
+                """,
+                org_id, upload_id, last_id, batch_size
+            )
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    async def get_ticket(self, ticket_id: str, org_id: str) -> Optional[dict]:
+        return await self._fetchrow(
+            """
+            SELECT id, org_id, upload_id, ticket_id, description, category, subcategory, priority, created_at
+            FROM tickets WHERE id = $1 AND org_id = $2
+            """,
+            ticket_id, org_id
+        )
+
+    async def search_similar_tickets(
+        self,
+        org_id: str,
+        ticket_id: str,
+        limit: int = 10,
+        upload_id: str = None,
+        category: str = None,
+        created_after: datetime = None,
+        created_before: datetime = None
+    ) -> list[dict]:
+        return await self._fetch(
+            "SELECT * FROM search_similar_tickets($1, $2, $3, $4, $5, $6, $7, $8)",
+            ticket_id, org_id, limit, upload_id, category, created_after, created_before, self.ef_search
+        )
+
+    # ==================== Clusters ====================
+    async def create_cluster(self, cluster_data: dict) -> dict:
+        return await self._insert("clusters", cluster_data)
+
+    async def get_clusters(
+        self,
+        org_id: str,
+        upload_id: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None,
+        cluster_ids: list[str] = None
+    ) -> list[dict]:
+        after = decode_cursor(cursor, CLUSTER_SORT_KEYS) if cursor else {"ticket_count": None, "id": None}
+        return await self._fetch(
+            f"""
+            SELECT {_projection(columns, CLUSTER_COLUMNS, CLUSTER_SORT_KEYS)} FROM clusters
+            WHERE org_id = $1 AND ($2::uuid IS NULL OR upload_id = $2)
+              AND ($3::int IS NULL OR ticket_count < $3 OR (ticket_count = $3 AND id > $4::uuid))
+              AND ($6::uuid[] IS NULL OR id = ANY($6))
+            ORDER BY ticket_count DESC, id
+            LIMIT $5
+            """,
+            org_id, upload_id, None if after["ticket_count"] is None else int(after["ticket_count"]), after["id"], limit,
+            cluster_ids
+        )
+
+    async def get_cluster(self, cluster_id: str, org_id: str) -> Optional[dict]:
+        return await self._fetchrow("SELECT * FROM clusters WHERE id = $1 AND org_id = $2", cluster_id, org_id)
+
+    @staticmethod
+    async def _copy_clusters(conn: asyncpg.Connection, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        """COPY clusters and their memberships (caller holds the transaction)."""
+        # Ids are generated here so the result keeps the input order
+        cluster_ids = [str(uuid.uuid4()) for _ in clusters]
+        await conn.copy_records_to_table(
+            "clusters",
+            columns=["id", "org_id", "upload_id", "auto_name", "summary", "ticket_count", "centroid"],
+            records=[
+                (cluster_id, org_id, upload_id, c["auto_name"], c.get("summary"),
+                 c.get("ticket_count", len(c["ticket_ids"])), c.get("centroid"))
+                for cluster_id, c in zip(cluster_ids, clusters)
+            ]
+        )
+        await conn.copy_records_to_table(
+            "cluster_tickets",
+            columns=["cluster_id", "ticket_id"],
+            records=[
+                (cluster_id, ticket_id)
+                for cluster_id, c in zip(cluster_ids, clusters)
+                for ticket_id in c["ticket_ids"]
+            ]
+        )
+        return [{"id": cluster_id} for cluster_id in cluster_ids]
+
+    async def create_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            return await self._copy_clusters(conn, org_id, upload_id, clusters)
+
+    async def search_similar_clusters(self, org_id: str, embedding: list[float], limit: int = 50, threshold: float = 0.5) -> list[dict]:
+        return await self._fetch(
+            "SELECT * FROM search_clusters($1, $2, $3, $4, $5)",
+            embedding, org_id, threshold, limit, self.ef_search
+        )
+
+    async def replace_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                "DELETE FROM clusters WHERE org_id = $1 AND ($2::uuid IS NULL OR upload_id = $2)",
+                org_id, upload_id
+            )
+            await conn.execute(
+                "DELETE FROM cluster_hierarchies WHERE org_id = $1 AND ($2::uuid IS NULL OR upload_id = $2)",
+                org_id, upload_id
+            )
+            return await self._copy_clusters(conn, org_id, upload_id, clusters)
+
+    async def save_cluster_hierarchy(self, hierarchy: dict) -> dict:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                "DELETE FROM cluster_hierarchies WHERE org_id = $1 AND upload_id IS NOT DISTINCT FROM $2::uuid",
+                hierarchy["org_id"], hierarchy["upload_id"]
+            )
+            columns = list(hierarchy)
+            placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+            return _row(await conn.fetchrow(
+                f"INSERT INTO cluster_hierarchies ({', '.join(columns)}) VALUES ({placeholders}) RETURNING *",
+                *(hierarchy[c] for c in columns)
+            ))
+
+    async def get_cluster_hierarchy(self, org_id: str, upload_id: str) -> Optional[dict]:
+        return await self._fetchrow(
+            "SELECT * FROM cluster_hierarchies WHERE org_id = $1 AND upload_id IS NOT DISTINCT FROM $2::uuid",
+            org_id, upload_id
+        )
+
+    # ==================== Knowledge Base ====================
+    async def create_knowledge_entry(self, entry: dict) -> dict:
+        return await self._insert("knowledge_entries", {**entry, "status": "pending"})
+
+    async def _list_knowledge(self, org_id: str, filters: dict, columns: list[str], limit: int, cursor: str) -> list[dict]:
+        """
+        Knowledge list query, newest first. Only the given filters appear in the
+        SQL (no "$n IS NULL OR ..." branches), so each variant gets an index plan.
+        """
+        args = [org_id]
+        where = ["org_id = $1"]
+        for column, value in filters.items():
+            args.append(value)
+            where.append(f"{column} = ANY(${len(args)})" if isinstance(value, list) else f"{column} = ${len(args)}")
+        if cursor:
+            after = decode_cursor(cursor, KNOWLEDGE_SORT_KEYS)
+            args.extend([_value("created_at", after["created_at"]), after["id"]])
+            where.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)}::uuid)")
+        args.append(limit)
+        return await self._fetch(
+            f"""
+            SELECT {_projection(columns, KNOWLEDGE_COLUMNS, KNOWLEDGE_SORT_KEYS)} FROM knowledge_entries
+            WHERE {" AND ".join(where)}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ${len(args)}
+            """,
+            *args
+        )
+
+    async def get_knowledge_entries(
+        self,
+        org_id: str,
+        status: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        return await self._list_knowledge(org_id, {"status": status} if status else {}, columns, limit, cursor)
+
+    async def get_knowledge_entry(self, entry_id: str, org_id: str) -> Optional[dict]:
+        return await self._fetchrow(
+            f"SELECT {', '.join(KNOWLEDGE_COLUMNS)} FROM knowledge_entries WHERE id = $1 AND org_id = $2",
+            entry_id, org_id
+        )
+
+    async def list_knowledge_by_submitter(
+        self,
+        org_id: str,
+        submitted_by: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        return await self._list_knowledge(org_id, {"submitted_by": submitted_by}, columns, limit, cursor)
+
+    async def list_knowledge_by_status(
+        self,
+        org_id: str,
+        statuses: list[str],
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        return await self._list_knowledge(org_id, {"status": list(statuses)}, columns, limit, cursor)
+
+    async def count_knowledge_by_status(self, org_id: str) -> dict[str, int]:
+        rows = await self._fetch(
+            "SELECT status, COUNT(*) AS count FROM knowledge_entries WHERE org_id = $1 GROUP BY status",
+            org_id
+        )
+        return {row["status"]: row["count"] for row in rows}
+
+    async def update_knowledge_status(self, entry_id: str, status: str, approved_by: str = None, rejection_reason: str = None, embedding: list[float] = None) -> None:
+        update_data = {
+            "status": status,
+            "updated_at": datetime.now(timezone.utc)
+        }
+        if approved_by:
+            update_data["approved_by"] = approved_by
+            update_data["approved_at"] = datetime.now(timezone.utc)
+        if rejection_reason:
+            update_data["rejection_reason"] = rejection_reason
+        if embedding is not None:
+            update_data["embedding"] = embedding
+        await self._update("knowledge_entries", entry_id, update_data)
+
+    async def get_knowledge_embeddings(self, org_id: str) -> list[dict]:
+        return await self._fetch(
+            f"""
+            SELECT {_KNOWLEDGE_RESULT_COLUMNS}, embedding FROM knowledge_entries
+            WHERE org_id = $1 AND status = 'approved' AND embedding IS NOT NULL
+            """,
+            org_id
+        )
+
+    async def search_similar_knowledge(self, org_id: str, embedding: list[float], limit: int = 3, threshold: float = 0.7) -> list[dict]:
+        return await self._fetch(
+            "SELECT * FROM search_knowledge($1, $2, $3, $4, $5)",
+            embedding, org_id, threshold, limit, self.ef_search
+        )
+
+    async def search_similar_knowledge_batch(self, org_id: str, embeddings: list[list[float]], limit: int = 3, threshold: float = 0.7) -> list[list[dict]]:
+        rows = await self._fetch(
+            "SELECT * FROM search_knowledge_batch($1, $2, $3, $4, $5)",
+            list(embeddings), org_id, threshold, limit, self.ef_search
+        )
+        results = [[] for _ in embeddings]
+        for row in rows:
+            results[row.pop("query_index")].append(row)
+        return results
+
+    # ==================== Assessments ====================
+    async def get_cached_assessment(self, cluster_id: str, org_id: str, knowledge_fingerprint: str, prompt_version: str) -> Optional[dict]:
+        return await self._fetchrow(
+            """
+            SELECT * FROM cluster_assessments
+            WHERE cluster_id = $1 AND org_id = $2 AND knowledge_fingerprint = $3
+              AND prompt_version = $4 AND NOT stale
+            """,
+            cluster_id, org_id, knowledge_fingerprint, prompt_version
+        )
+
+    async def save_cached_assessment(self, record: dict) -> None:
+        await self._execute(
+            """
+            INSERT INTO cluster_assessments
+                (org_id, cluster_id, knowledge_fingerprint, knowledge_ids, prompt_version, assessment, stale, updated_at)
+            VALUES ($1, $2, $3, $4, $5, $6, FALSE, NOW())
+            ON CONFLICT (cluster_id, knowledge_fingerprint, prompt_version) DO UPDATE SET
+                knowledge_ids = EXCLUDED.knowledge_ids,
+                assessment = EXCLUDED.assessment,
+                stale = FALSE,
+                updated_at = NOW()
+            """,
+            record["org_id"], record["cluster_id"], record["knowledge_fingerprint"],
+            record.get("knowledge_ids", []), record["prompt_version"], record["assessment"]
+        )
+
+    async def mark_assessments_stale(self, org_id: str, cluster_ids: list[str]) -> None:
+        if not cluster_ids:
+            return
+        await self._execute(
+            "UPDATE cluster_assessments SET stale = TRUE WHERE org_id = $1 AND cluster_id = ANY($2::uuid[])",
+            org_id, cluster_ids
+        )
+
+    async def get_latest_assessments(self, org_id: str, cluster_id: str = None) -> list[dict]:
+        return await self._fetch("SELECT * FROM get_latest_assessments($1, $2)", org_id, cluster_id)
+
+    # ==================== Jobs ====================
+    async def create_job(self, org_id: str, job_type: str, upload_id: str = None, params: dict = None) -> dict:
+        return await self._insert("jobs", {
+            "org_id": org_id,
+            "upload_id": upload_id,
+            "job_type": job_type,
+            "status": "queued",
+            "params": params or {},
+            "progress": {}
+        })
+
+    async def update_job(self, job_id: str, status: str = None, progress: dict = None, result: dict = None, token_usage: dict = None) -> None:
+        update_data = {"updated_at": datetime.now(timezone.utc)}
+        if status is not None:
+            update_data["status"] = status
+        if progress is not None:
+            update_data["progress"] = progress
+        if result is not None:
+            update_data["result"] = result
+        if token_usage is not None:
+            update_data["token_usage"] = token_usage
+        await self._update("jobs", job_id, update_data)
+
+    async def get_job(self, job_id: str, org_id: str) -> Optional[dict]:
+        return await self._fetchrow("SELECT * FROM jobs WHERE id = $1 AND org_id = $2", job_id, org_id)
+
+    async def get_token_usage(self, org_id: str, limit: int = 50) -> dict:
+        row = await self._fetchrow("SELECT get_token_usage($1, $2) AS usage", org_id, limit)
+        return row["usage"] or {}
+
+    async def get_analytics_dashboard(self, org_id: str, limit: int = 10) -> dict:
+        row = await self._fetchrow("SELECT get_analytics_dashboard($1, $2) AS dashboard", org_id, limit)
+        return row["dashboard"] or {}
+
+    async def get_cluster_categories(self, org_id: str) -> list[dict]:
+        return await self._fetch("SELECT * FROM get_cluster_categories($1)", org_id)
+
+    # ==================== Audit Logs ====================
+    async def create_audit_log(self, org_id: str, knowledge_id: str, action: str, actor_id: str, details: dict = None) -> None:
+        await self._execute(
+            "INSERT INTO audit_logs (org_id, knowledge_id, action, actor_id, details) VALUES ($1, $2, $3, $4, $5)",
+            org_id, knowledge_id, action, actor_id, details or {}
+        )
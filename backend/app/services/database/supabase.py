@@ -2,18 +2,24 @@
 Supabase implementation of the database service.
 Uses Supabase's PostgreSQL with pgvector for vector operations.
 """
-from typing import Optional
+from typing import AsyncIterable, AsyncIterator, Optional
 from supabase import create_client, Client
-from .base import DatabaseService
+from .base import (
+    DatabaseService, CLUSTER_COLUMNS, TICKET_COLUMNS, KNOWLEDGE_COLUMNS,
+    CLUSTER_SORT_KEYS, TICKET_SORT_KEYS, KNOWLEDGE_SORT_KEYS, select_columns,
+)
+from app.utils.helpers import decode_cursor, parse_vector
 import uuid
+import json
 from datetime import datetime
 
 
 class SupabaseDatabaseService(DatabaseService):
     """Supabase database service implementation."""
     
-    def __init__(self, url: str, key: str):
+    def __init__(self, url: str, key: str, ef_search: int = 40):
         self.client: Client = create_client(url, key)
+        self.ef_search = ef_search  # HNSW candidate list size for vector searches
     
     def _generate_id(self) -> str:
         """Generate a unique ID."""
@@ -89,10 +95,12 @@ class SupabaseDatabaseService(DatabaseService):
         result = self.client.table("uploads").insert(data).execute()
         return result.data[0] if result.data else data
     
-    async def update_upload_status(self, upload_id: str, status: str, row_count: int = None) -> None:
+    async def update_upload_status(self, upload_id: str, status: str, row_count: int = None, token_usage: dict = None) -> None:
         update_data = {"status": status}
         if row_count is not None:
             update_data["row_count"] = row_count
+        if token_usage is not None:
+            update_data["token_usage"] = token_usage
         self.client.table("uploads").update(update_data).eq("id", upload_id).execute()
     
     async def get_upload(self, upload_id: str, org_id: str) -> Optional[dict]:
@@ -101,20 +109,106 @@ class SupabaseDatabaseService(DatabaseService):
     
     # ==================== Tickets ====================
     async def insert_tickets(self, tickets: list[dict]) -> None:
-        # Batch insert in chunks of 100
-        chunk_size = 100
+        # Batch insert in chunks of 500 (rows carry their embeddings)
+        chunk_size = 500
         for i in range(0, len(tickets), chunk_size):
             chunk = tickets[i:i + chunk_size]
             self.client.table("tickets").insert(chunk).execute()
     
-    async def get_tickets_by_upload(self, upload_id: str, org_id: str) -> list[dict]:
-        result = self.client.table("tickets").select("*").eq("upload_id", upload_id).eq("org_id", org_id).execute()
-        return result.data or []
+    async def load_tickets(self, batches: AsyncIterable[list[dict]]) -> int:
+        # No COPY over the REST API: each batch goes through the chunked insert
+        count = 0
+        async for batch in batches:
+            await self.insert_tickets(batch)
+            count += len(batch)
+        return count
     
-    async def update_ticket_embeddings(self, ticket_ids: list[str], embeddings: list[list[float]]) -> None:
-        for ticket_id, embedding in zip(ticket_ids, embeddings):
-            self.client.table("tickets").update({"embedding": embedding}).eq("id", ticket_id).execute()
-
+    async def get_tickets_by_upload(
+        self,
+        upload_id: str,
+        org_id: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        query = (
+            self.client.table("tickets")
+            .select(", ".join(select_columns(columns, TICKET_COLUMNS, TICKET_SORT_KEYS)))
+            .eq("upload_id", upload_id)
+            .eq("org_id", org_id)
+        )
+        if cursor:
+            after = decode_cursor(cursor, TICKET_SORT_KEYS)
+            created_at, last_id = self._cursor_timestamp(after["created_at"]), self._cursor_id(after["id"])
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{last_id})')
+        query = query.order("created_at").order("id")
+        if limit:
+            query = query.limit(limit)
+        return query.execute().data or []
+    
+    async def iter_ticket_embeddings(self, org_id: str, upload_id: str = None, batch_size: int = 2000) -> AsyncIterator[list[dict]]:
+        # Keyset pagination on id keeps every page an index range scan
+        last_id = None
+        while True:
+            query = self.client.table("tickets").select("id, description, embedding").eq("org_id", org_id).not_.is_("embedding", "null")
+            if upload_id:
+                query = query.eq("upload_id", upload_id)
+            if last_id:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(batch_size).execute().data or []
+            if not rows:
+                return
+            for row in rows:
+                row["embedding"] = parse_vector(row["embedding"])
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+    
+    @staticmethod
+    def _cursor_id(value) -> str:
+        """Cursor values end up in PostgREST filter strings: only accept well-formed ones."""
+        return str(uuid.UUID(str(value)))
+    
+    @staticmethod
+    def _cursor_timestamp(value) -> str:
+        return datetime.fromisoformat(str(value)).isoformat()
+    
+    
+    async def get_ticket(self, ticket_id: str, org_id: str) -> Optional[dict]:
+        result = (
+            self.client.table("tickets")
+            .select("id, org_id, upload_id, ticket_id, description, category, subcategory, priority, created_at")
+            .eq("id", ticket_id)
+            .eq("org_id", org_id)
+            .execute()
+        )
+        return result.data[0] if result.data else None
+    
+    async def search_similar_tickets(
+        self,
+        org_id: str,
+        ticket_id: str,
+        limit: int = 10,
+        upload_id: str = None,
+        category: str = None,
+        created_after: datetime = None,
+        created_before: datetime = None
+    ) -> list[dict]:
+        result = self.client.rpc(
+            "search_similar_tickets",
+            {
+                "p_ticket_id": ticket_id,
+                "match_org_id": org_id,
+                "match_count": limit,
+                "filter_upload_id": upload_id,
+                "filter_category": category,
+                "created_after": created_after.isoformat() if created_after else None,
+                "created_before": created_before.isoformat() if created_before else None,
+                "ef_search": self.ef_search
+            }
+        ).execute()
+        return result.data or []
     
     # ==================== Clusters ====================
     async def create_cluster(self, cluster_data: dict) -> dict:
@@ -127,21 +221,100 @@ class SupabaseDatabaseService(DatabaseService):
         result = self.client.table("clusters").insert(data).execute()
         return result.data[0] if result.data else data
     
-    async def get_clusters(self, org_id: str, upload_id: str = None) -> list[dict]:
-        query = self.client.table("clusters").select("*").eq("org_id", org_id)
+    async def get_clusters(
+        self,
+        org_id: str,
+        upload_id: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None,
+        cluster_ids: list[str] = None
+    ) -> list[dict]:
+        query = (
+            self.client.table("clusters")
+            .select(", ".join(select_columns(columns, CLUSTER_COLUMNS, CLUSTER_SORT_KEYS)))
+            .eq("org_id", org_id)
+        )
         if upload_id:
             query = query.eq("upload_id", upload_id)
-        result = query.order("ticket_count", desc=True).execute()
-        return result.data or []
+        if cluster_ids is not None:
+            query = query.in_("id", cluster_ids)
+        if cursor:
+            after = decode_cursor(cursor, CLUSTER_SORT_KEYS)
+            count, last_id = int(after["ticket_count"]), self._cursor_id(after["id"])
+            query = query.or_(f"ticket_count.lt.{count},and(ticket_count.eq.{count},id.gt.{last_id})")
+        query = query.order("ticket_count", desc=True).order("id")
+        if limit:
+            query = query.limit(limit)
+        return query.execute().data or []
     
     async def get_cluster(self, cluster_id: str, org_id: str) -> Optional[dict]:
         result = self.client.table("clusters").select("*").eq("id", cluster_id).eq("org_id", org_id).execute()
         return result.data[0] if result.data else None
     
-    async def assign_tickets_to_cluster(self, cluster_id: str, ticket_ids: list[str]) -> None:
-        for ticket_id in ticket_ids:
-            data = {"cluster_id": cluster_id, "ticket_id": ticket_id}
-            self.client.table("cluster_tickets").insert(data).execute()
+    async def create_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        # Clusters and memberships are inserted by one Postgres function, i.e. one transaction
+        result = self.client.rpc(
+            "create_clusters",
+            {"p_org_id": org_id, "p_upload_id": upload_id, "p_clusters": self._cluster_payload(clusters)}
+        ).execute()
+        return [{"id": cluster_id} for cluster_id in (result.data or [])]
+    
+    async def search_similar_clusters(self, org_id: str, embedding: list[float], limit: int = 50, threshold: float = 0.5) -> list[dict]:
+        result = self.client.rpc(
+            "search_clusters",
+            {
+                "query_embedding": embedding,
+                "match_org_id": org_id,
+                "match_threshold": threshold,
+                "match_count": limit,
+                "ef_search": self.ef_search
+            }
+        ).execute()
+        return result.data or []
+    
+    @staticmethod
+    def _cluster_payload(clusters: list[dict]) -> list[dict]:
+        return [
+            {
+                "auto_name": c["auto_name"],
+                "summary": c.get("summary"),
+                "ticket_count": c.get("ticket_count", len(c["ticket_ids"])),
+                "centroid": c.get("centroid"),
+                "ticket_ids": c["ticket_ids"]
+            }
+            for c in clusters
+        ]
+    
+    async def replace_clusters(self, org_id: str, upload_id: str, clusters: list[dict]) -> list[dict]:
+        # Delete + insert run inside one Postgres function, i.e. one transaction
+        result = self.client.rpc(
+            "replace_clusters",
+            {"p_org_id": org_id, "p_upload_id": upload_id, "p_clusters": self._cluster_payload(clusters)}
+        ).execute()
+        return [{"id": cluster_id} for cluster_id in (result.data or [])]
+    
+    def _hierarchy_query(self, query, org_id: str, upload_id: str):
+        query = query.eq("org_id", org_id)
+        return query.eq("upload_id", upload_id) if upload_id else query.is_("upload_id", "null")
+    
+    async def save_cluster_hierarchy(self, hierarchy: dict) -> dict:
+        self._hierarchy_query(
+            self.client.table("cluster_hierarchies").delete(), hierarchy["org_id"], hierarchy["upload_id"]
+        ).execute()
+        data = {
+            "id": self._generate_id(),
+            **hierarchy,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        result = self.client.table("cluster_hierarchies").insert(data).execute()
+        return result.data[0] if result.data else data
+    
+    async def get_cluster_hierarchy(self, org_id: str, upload_id: str) -> Optional[dict]:
+        result = self._hierarchy_query(
+            self.client.table("cluster_hierarchies").select("*"), org_id, upload_id
+        ).execute()
+        return result.data[0] if result.data else None
     
     # ==================== Knowledge Base ====================
     async def create_knowledge_entry(self, entry: dict) -> dict:
@@ -156,14 +329,73 @@ class SupabaseDatabaseService(DatabaseService):
         result = self.client.table("knowledge_entries").insert(data).execute()
         return result.data[0] if result.data else data
     
-    async def get_knowledge_entries(self, org_id: str, status: str = None) -> list[dict]:
-        query = self.client.table("knowledge_entries").select("*").eq("org_id", org_id)
+    def _knowledge_list(self, org_id: str, columns: list[str], limit: int, cursor: str):
+        """Knowledge list query: projection, keyset cursor, newest first. Callers add filters."""
+        query = (
+            self.client.table("knowledge_entries")
+            .select(", ".join(select_columns(columns, KNOWLEDGE_COLUMNS, KNOWLEDGE_SORT_KEYS)))
+            .eq("org_id", org_id)
+        )
+        if cursor:
+            after = decode_cursor(cursor, KNOWLEDGE_SORT_KEYS)
+            created_at, last_id = self._cursor_timestamp(after["created_at"]), self._cursor_id(after["id"])
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})')
+        query = query.order("created_at", desc=True).order("id", desc=True)
+        if limit:
+            query = query.limit(limit)
+        return query
+    
+    async def get_knowledge_entries(
+        self,
+        org_id: str,
+        status: str = None,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        query = self._knowledge_list(org_id, columns, limit, cursor)
         if status:
             query = query.eq("status", status)
-        result = query.order("created_at", desc=True).execute()
-        return result.data or []
+        return query.execute().data or []
+    
+    async def get_knowledge_entry(self, entry_id: str, org_id: str) -> Optional[dict]:
+        result = (
+            self.client.table("knowledge_entries")
+            .select(", ".join(KNOWLEDGE_COLUMNS))
+            .eq("id", entry_id)
+            .eq("org_id", org_id)
+            .execute()
+        )
+        return result.data[0] if result.data else None
+    
+    async def list_knowledge_by_submitter(
+        self,
+        org_id: str,
+        submitted_by: str,
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        query = self._knowledge_list(org_id, columns, limit, cursor).eq("submitted_by", submitted_by)
+        return query.execute().data or []
+    
+    async def list_knowledge_by_status(
+        self,
+        org_id: str,
+        statuses: list[str],
+        columns: list[str] = None,
+        limit: int = None,
+        cursor: str = None
+    ) -> list[dict]:
+        query = self._knowledge_list(org_id, columns, limit, cursor).in_("status", statuses)
+        return query.execute().data or []
     
-    async def update_knowledge_status(self, entry_id: str, status: str, approved_by: str = None, rejection_reason: str = None) -> None:
+    async def count_knowledge_by_status(self, org_id: str) -> dict[str, int]:
+        # GROUP BY in the database (index-only scan) instead of fetching rows
+        result = self.client.rpc("count_knowledge_by_status", {"p_org_id": org_id}).execute()
+        return {row["status"]: row["count"] for row in result.data or []}
+    
+    async def update_knowledge_status(self, entry_id: str, status: str, approved_by: str = None, rejection_reason: str = None, embedding: list[float] = None) -> None:
         update_data = {
             "status": status,
             "updated_at": datetime.utcnow().isoformat()
@@ -173,8 +405,24 @@ class SupabaseDatabaseService(DatabaseService):
             update_data["approved_at"] = datetime.utcnow().isoformat()
         if rejection_reason:
             update_data["rejection_reason"] = rejection_reason
+        if embedding is not None:
+            update_data["embedding"] = embedding
         self.client.table("knowledge_entries").update(update_data).eq("id", entry_id).execute()
     
+    async def get_knowledge_embeddings(self, org_id: str) -> list[dict]:
+        result = (
+            self.client.table("knowledge_entries")
+            .select("id, org_id, category, subcategory, current_process, automation_level, tools_used, blockers, resolution_steps, embedding")
+            .eq("org_id", org_id)
+            .eq("status", "approved")
+            .not_.is_("embedding", "null")
+            .execute()
+        )
+        rows = result.data or []
+        for row in rows:
+            row["embedding"] = parse_vector(row["embedding"])
+        return rows
+    
     async def search_similar_knowledge(self, org_id: str, embedding: list[float], limit: int = 3, threshold: float = 0.7) -> list[dict]:
         """
         Search for similar knowledge entries using pgvector.
@@ -186,15 +434,114 @@ class SupabaseDatabaseService(DatabaseService):
                 "query_embedding": embedding,
                 "match_org_id": org_id,
                 "match_threshold": threshold,
-                "match_count": limit
+                "match_count": limit,
+                "ef_search": self.ef_search
             }
         ).execute()
         return result.data or []
     
+    async def search_similar_knowledge_batch(self, org_id: str, embeddings: list[list[float]], limit: int = 3, threshold: float = 0.7) -> list[list[dict]]:
+        result = self.client.rpc(
+            "search_knowledge_batch",
+            {
+                # Sent as pgvector literals; PostgREST casts text[] to vector[]
+                "query_embeddings": [json.dumps([float(x) for x in e]) for e in embeddings],
+                "match_org_id": org_id,
+                "match_threshold": threshold,
+                "match_count": limit,
+                "ef_search": self.ef_search
+            }
+        ).execute()
+        
+        results = [[] for _ in embeddings]
+        for row in result.data or []:
+            results[row.pop("query_index")].append(row)
+        return results
+    
+    # ==================== Assessments ====================
+    async def get_cached_assessment(self, cluster_id: str, org_id: str, knowledge_fingerprint: str, prompt_version: str) -> Optional[dict]:
+        result = (
+            self.client.table("cluster_assessments")
+            .select("*")
+            .eq("cluster_id", cluster_id)
+            .eq("org_id", org_id)
+            .eq("knowledge_fingerprint", knowledge_fingerprint)
+            .eq("prompt_version", prompt_version)
+            .eq("stale", False)
+            .execute()
+        )
+        return result.data[0] if result.data else None
+    
+    async def save_cached_assessment(self, record: dict) -> None:
+        data = {
+            "id": self._generate_id(),
+            **record,
+            "stale": False,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        self.client.table("cluster_assessments").upsert(
+            data,
+            on_conflict="cluster_id,knowledge_fingerprint,prompt_version"
+        ).execute()
+    
+    async def mark_assessments_stale(self, org_id: str, cluster_ids: list[str]) -> None:
+        if not cluster_ids:
+            return
+        self.client.table("cluster_assessments").update({"stale": True}).eq("org_id", org_id).in_("cluster_id", cluster_ids).execute()
+    
+    async def get_latest_assessments(self, org_id: str, cluster_id: str = None) -> list[dict]:
+        result = self.client.rpc("get_latest_assessments", {"p_org_id": org_id, "p_cluster_id": cluster_id}).execute()
+        return result.data or []
+    
+    # ==================== Jobs ====================
+    async def create_job(self, org_id: str, job_type: str, upload_id: str = None, params: dict = None) -> dict:
+        data = {
+            "id": self._generate_id(),
+            "org_id": org_id,
+            "upload_id": upload_id,
+            "job_type": job_type,
+            "status": "queued",
+            "params": params or {},
+            "progress": {},
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        result = self.client.table("jobs").insert(data).execute()
+        return result.data[0] if result.data else data
+    
+    async def update_job(self, job_id: str, status: str = None, progress: dict = None, result: dict = None, token_usage: dict = None) -> None:
+        update_data = {"updated_at": datetime.utcnow().isoformat()}
+        if status is not None:
+            update_data["status"] = status
+        if progress is not None:
+            update_data["progress"] = progress
+        if result is not None:
+            update_data["result"] = result
+        if token_usage is not None:
+            update_data["token_usage"] = token_usage
+        self.client.table("jobs").update(update_data).eq("id", job_id).execute()
+    
+    async def get_job(self, job_id: str, org_id: str) -> Optional[dict]:
+        result = self.client.table("jobs").select("*").eq("id", job_id).eq("org_id", org_id).execute()
+        return result.data[0] if result.data else None
+    
+    async def get_token_usage(self, org_id: str, limit: int = 50) -> dict:
+        result = self.client.rpc("get_token_usage", {"p_org_id": org_id, "p_limit": limit}).execute()
+        return result.data or {}
+    
+    async def get_analytics_dashboard(self, org_id: str, limit: int = 10) -> dict:
+        result = self.client.rpc("get_analytics_dashboard", {"p_org_id": org_id, "p_limit": limit}).execute()
+        return result.data or {}
+    
+    async def get_cluster_categories(self, org_id: str) -> list[dict]:
+        result = self.client.rpc("get_cluster_categories", {"p_org_id": org_id}).execute()
+        return result.data or []
+    
     # ==================== Audit Logs ====================
-    async def create_audit_log(self, knowledge_id: str, action: str, actor_id: str, details: dict = None) -> None:
+    async def create_audit_log(self, org_id: str, knowledge_id: str, action: str, actor_id: str, details: dict = None) -> None:
         data = {
             "id": self._generate_id(),
+            "org_id": org_id,
             "knowledge_id": knowledge_id,
             "action": action,
             "actor_id": actor_id,
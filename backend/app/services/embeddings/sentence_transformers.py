@@ -1,7 +1,9 @@
 """
 Sentence Transformers implementation for embeddings.
-Free, runs locally on CPU, good quality.
+Free, runs locally on CPU, good quality. Encoding is CPU-bound, so it runs
+in a worker thread to keep the event loop serving other requests.
 """
+import asyncio
 from sentence_transformers import SentenceTransformer
 from .base import EmbeddingService
 
@@ -27,10 +29,12 @@ class SentenceTransformersEmbeddingService(EmbeddingService):
     
     async def embed_text(self, text: str) -> list[float]:
         """Generate embedding for a single text."""
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        embedding = await asyncio.to_thread(self.model.encode, text, convert_to_numpy=True)
         return embedding.tolist()
     
     async def embed_texts(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for multiple texts (batch)."""
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+        embeddings = await asyncio.to_thread(
+            self.model.encode, texts, convert_to_numpy=True, show_progress_bar=len(texts) > 1000
+        )
         return embeddings.tolist()
@@ -0,0 +1,155 @@
+"""
+Hierarchy service - Persisted merge tree over sub-clusters.
+
+Clustering produces fine-grained leaf sub-clusters and a Ward merge tree over
+their centroids. Cutting the tree at any level gives coarser or finer clusters
+(counts, centroids, keywords) without touching ticket embeddings again.
+"""
+from typing import Optional
+import numpy as np
+
+from app.services import get_database_service
+from app.services.keywords import keywords_to_name
+
+# Hierarchies are immutable once stored, so cache them per upload
+_hierarchy_cache: dict[tuple[str, str], dict] = {}
+_HIERARCHY_CACHE_SIZE = 64
+
+
+def build_centroid_hierarchy(centroids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Agglomerate weighted centroids with Ward's criterion.
+
+    Merging sub-clusters A and B costs nA*nB/(nA+nB) * ||cA - cB||^2, which is
+    exactly the Ward cost of merging their tickets, so cuts of this tree match
+    a ticket-level Ward clustering above the leaf level.
+
+    Returns:
+        (n_leaves - 1) x 4 merge matrix in scipy linkage format:
+        [node_a, node_b, distance, ticket_count]. Leaves are 0..n-1 and
+        the i-th merge creates node n + i.
+    """
+    n = len(centroids)
+    merges = np.zeros((max(n - 1, 0), 4))
+    if n < 2:
+        return merges
+
+    centers = np.asarray(centroids, dtype=np.float64).copy()
+    sizes = np.asarray(counts, dtype=np.float64).copy()
+    node_ids = np.arange(n)
+    active = np.ones(n, dtype=bool)
+
+    sq_norms = (centers ** 2).sum(axis=1)
+    sq_dist = np.maximum(sq_norms[:, None] + sq_norms[None, :] - 2 * centers @ centers.T, 0)
+    cost = (sizes[:, None] * sizes[None, :]) / (sizes[:, None] + sizes[None, :]) * sq_dist
+    np.fill_diagonal(cost, np.inf)
+
+    for step in range(n - 1):
+        a, b = np.unravel_index(np.argmin(cost), cost.shape)
+        a, b = min(a, b), max(a, b)
+
+        merged_size = sizes[a] + sizes[b]
+        merges[step] = [node_ids[a], node_ids[b], np.sqrt(2 * cost[a, b]), merged_size]
+
+        # Slot a becomes the merged node, slot b is retired
+        centers[a] = (centers[a] * sizes[a] + centers[b] * sizes[b]) / merged_size
+        sizes[a] = merged_size
+        node_ids[a] = n + step
+        active[b] = False
+
+        diff = ((centers - centers[a]) ** 2).sum(axis=1)
+        row = sizes * merged_size / (sizes + merged_size) * diff
+        row[~active] = np.inf
+        row[a] = np.inf
+        cost[a, :] = row
+        cost[:, a] = row
+        cost[b, :] = np.inf
+        cost[:, b] = np.inf
+
+    return merges
+
+
+def cut_hierarchy(merges: np.ndarray, n_leaves: int, n_clusters: int) -> np.ndarray:
+    """
+    Cut the merge tree into n_clusters groups.
+
+    Returns:
+        Group label per leaf, numbered 0..n_clusters-1 by first appearance
+    """
+    n_clusters = max(1, min(n_clusters, n_leaves))
+    parent = list(range(2 * n_leaves - 1)) if n_leaves else []
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for step in range(n_leaves - n_clusters):
+        a, b = int(merges[step][0]), int(merges[step][1])
+        new_node = n_leaves + step
+        parent[find(a)] = new_node
+        parent[find(b)] = new_node
+
+    roots = [find(leaf) for leaf in range(n_leaves)]
+    relabel = {}
+    return np.array([relabel.setdefault(root, len(relabel)) for root in roots], dtype=int)
+
+
+def summarize_cut(hierarchy: dict, n_clusters: int, include_centroids: bool = True) -> list[dict]:
+    """Aggregate leaf sub-clusters into the clusters of one cut, largest first."""
+    leaf_counts = np.asarray(hierarchy["leaf_counts"], dtype=np.float64)
+    n_leaves = len(leaf_counts)
+    labels = cut_hierarchy(np.asarray(hierarchy["merges"]), n_leaves, n_clusters)
+    leaf_keywords = hierarchy.get("leaf_keywords") or [[] for _ in range(n_leaves)]
+    leaf_cluster_ids = hierarchy.get("leaf_cluster_ids") or [None] * n_leaves
+    centroids = np.asarray(hierarchy["leaf_centroids"], dtype=np.float64) if include_centroids else None
+
+    clusters = []
+    for group in range(labels.max() + 1 if n_leaves else 0):
+        leaves = np.flatnonzero(labels == group)
+        weights = leaf_counts[leaves]
+        keywords = _merge_keywords([leaf_keywords[i] for i in leaves], weights)
+
+        cluster = {
+            "leaf_ids": leaves.tolist(),
+            "cluster_ids": sorted({leaf_cluster_ids[i] for i in leaves if leaf_cluster_ids[i]}),
+            "ticket_count": int(weights.sum()),
+            "name": keywords_to_name(keywords),
+            "keywords": keywords,
+        }
+        if include_centroids:
+            cluster["centroid"] = (weights @ centroids[leaves] / weights.sum()).tolist()
+        clusters.append(cluster)
+
+    clusters.sort(key=lambda c: c["ticket_count"], reverse=True)
+    return clusters
+
+
+def _merge_keywords(keyword_lists: list[list[str]], weights: np.ndarray, top_n: int = 10) -> list[str]:
+    """Combine ranked leaf keywords, weighting each leaf by its ticket count."""
+    scores = {}
+    for keywords, weight in zip(keyword_lists, weights):
+        for rank, keyword in enumerate(keywords):
+            scores[keyword] = scores.get(keyword, 0.0) + weight / (rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)[:top_n]
+
+
+async def get_hierarchy(org_id: str, upload_id: str) -> Optional[dict]:
+    """Load a stored hierarchy, cached in-process after the first read."""
+    key = (org_id, upload_id)
+    if key in _hierarchy_cache:
+        return _hierarchy_cache[key]
+
+    db = get_database_service()
+    hierarchy = await db.get_cluster_hierarchy(org_id, upload_id)
+    if hierarchy:
+        if len(_hierarchy_cache) >= _HIERARCHY_CACHE_SIZE:
+            _hierarchy_cache.pop(next(iter(_hierarchy_cache)))
+        _hierarchy_cache[key] = hierarchy
+    return hierarchy
+
+
+def invalidate_hierarchy(org_id: str, upload_id: str) -> None:
+    """Drop a cached hierarchy after it has been replaced."""
+    _hierarchy_cache.pop((org_id, upload_id), None)
@@ -3,12 +3,15 @@ Ingestion service - Process uploaded Excel files.
 """
 import pandas as pd
 import io
+import math
 import uuid
 from datetime import datetime
 from typing import Optional
 
+from app.config import get_settings
 from app.services import get_database_service, get_embedding_service
 from app.services.clustering import run_clustering
+from app.services.llm import track_token_usage
 
 
 async def process_upload(
@@ -22,84 +25,104 @@ async def process_upload(
     Process an uploaded file:
     1. Parse Excel/CSV
     2. Apply schema mapping
-    3. Store normalized tickets
-    4. Generate embeddings
+    3. Generate embeddings (in batches)
+    4. Stream normalized tickets with their embeddings to the database
     5. Run clustering
     """
     db = get_database_service()
     
-    try:
-        # 1. Parse file
-        if filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(file_contents))
-        else:
-            df = pd.read_excel(io.BytesIO(file_contents))
-        
-        # 2. Apply schema mapping
-        mapping_dict = {m["source_column"]: m["canonical_field"] for m in mappings}
-        
-        # Create normalized dataframe
-        normalized_data = []
-        for _, row in df.iterrows():
-            ticket = {
-                "id": str(uuid.uuid4()),
-                "org_id": org_id,
-                "upload_id": upload_id,
-                "raw_data": row.to_dict(),
-                "created_at": datetime.utcnow().isoformat()
-            }
+    with track_token_usage() as usage:
+        try:
+            # 1. Parse file
+            if filename.endswith('.csv'):
+                df = pd.read_csv(io.BytesIO(file_contents))
+            else:
+                df = pd.read_excel(io.BytesIO(file_contents))
             
-            # Map columns
-            for source_col, canonical_field in mapping_dict.items():
-                if source_col in row.index:
-                    value = row[source_col]
-                    # Handle NaN values
-                    if pd.isna(value):
-                        value = None
-                    elif isinstance(value, (int, float)):
-                        value = str(value)
-                    ticket[canonical_field] = value
+            # 2. Apply schema mapping
+            mapping_dict = {m["source_column"]: m["canonical_field"] for m in mappings}
             
-            # Ensure required fields
-            if not ticket.get("ticket_id"):
-                ticket["ticket_id"] = ticket["id"][:8]
-            if not ticket.get("description"):
-                ticket["description"] = "No description"
+            settings = get_settings()
+            embedding_service = get_embedding_service()
+            ticket_ids, descriptions, embeddings = [], [], []
             
-            normalized_data.append(ticket)
-        
-        # 3. Store tickets
-        await db.insert_tickets(normalized_data)
-        
-        # 4. Generate embeddings
-        embedding_service = get_embedding_service()
-        descriptions = [t["description"] for t in normalized_data]
-        embeddings = await embedding_service.embed_texts(descriptions)
-        
-        # Update tickets with embeddings
-        ticket_ids = [t["id"] for t in normalized_data]
-        await db.update_ticket_embeddings(ticket_ids, embeddings)
-        
-        # 5. Run clustering
-        await run_clustering(
-            upload_id=upload_id,
-            org_id=org_id,
-            ticket_ids=ticket_ids,
-            embeddings=embeddings,
-            descriptions=descriptions
-        )
-        
-        # Update upload status
-        await db.update_upload_status(
-            upload_id=upload_id,
-            status="completed",
-            row_count=len(normalized_data)
-        )
-        
-    except Exception as e:
-        # Update upload status to failed
-        await db.update_upload_status(
-            upload_id=upload_id,
-            status=f"failed: {str(e)}"
-        )
-        raise
+            async def ticket_batches():
+                # 3. Normalize and embed in batches (encoding runs in a worker thread, with no
+                #    database connection held), each written to the database when ready
+                for start in range(0, len(df), settings.INGESTION_BATCH_SIZE):
+                    batch = [
+                        normalize_ticket(row, mapping_dict, org_id, upload_id)
+                        for _, row in df.iloc[start:start + settings.INGESTION_BATCH_SIZE].iterrows()
+                    ]
+                    batch_descriptions = [t["description"] for t in batch]
+                    batch_embeddings = await embedding_service.embed_texts(batch_descriptions)
+                    for ticket, embedding in zip(batch, batch_embeddings):
+                        ticket["embedding"] = embedding
+                    
+                    ticket_ids.extend(t["id"] for t in batch)
+                    descriptions.extend(batch_descriptions)
+                    embeddings.extend(batch_embeddings)
+                    yield batch
+            
+            # 4. Store tickets with their embeddings (COPY on the Postgres backend)
+            row_count = await db.load_tickets(ticket_batches())
+            
+            # 5. Run clustering
+            await run_clustering(
+                upload_id=upload_id,
+                org_id=org_id,
+                ticket_ids=ticket_ids,
+                embeddings=embeddings,
+                descriptions=descriptions
+            )
+            
+            # Update upload status
+            await db.update_upload_status(
+                upload_id=upload_id,
+                status="completed",
+                row_count=row_count,
+                token_usage=usage.to_dict()
+            )
+            
+        except Exception as e:
+            # Update upload status to failed
+            await db.update_upload_status(
+                upload_id=upload_id,
+                status=f"failed: {str(e)}",
+                token_usage=usage.to_dict()
+            )
+            raise
+
+
+def normalize_ticket(row: pd.Series, mapping_dict: dict, org_id: str, upload_id: str) -> dict:
+    """Map one source row onto the canonical ticket fields."""
+    ticket = {
+        "id": str(uuid.uuid4()),
+        "org_id": org_id,
+        "upload_id": upload_id,
+        # Empty cells come back as NaN, which JSON(B) can't store
+        "raw_data": {
+            k: None if isinstance(v, float) and not math.isfinite(v) else v
+            for k, v in row.to_dict().items()
+        },
+        "created_at": datetime.utcnow().isoformat()
+    }
+    
+    # Map columns
+    for source_col, canonical_field in mapping_dict.items():
+        if source_col in row.index:
+            value = row[source_col]
+            # Handle NaN values
+            if pd.isna(value):
+                value = None
+            elif isinstance(value, (int, float)):
+                value = str(value)
+            ticket[canonical_field] = value
+    
+    # Ensure required fields
+    if not ticket.get("ticket_id"):
+        ticket["ticket_id"] = ticket["id"][:8]
+    if not ticket.get("description"):
+        ticket["description"] = "No description"
+    
+    return ticket
@@ -0,0 +1,91 @@
+"""
+Keyword service - Class-based TF-IDF (c-TF-IDF) keywords for clusters.
+Runs locally on sparse matrices, so clusters can be named without an LLM.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+def extract_cluster_keywords(
+    descriptions: list[str],
+    labels: list[int],
+    top_n: int = 10
+) -> dict[int, list[str]]:
+    """
+    Extract the most distinctive keywords for every cluster at once.
+
+    All descriptions of a cluster are treated as one class document:
+    term counts are summed per cluster with a sparse membership matrix,
+    normalised per cluster (tf) and weighted by log(1 + A / f_t), where A is
+    the average number of words per cluster and f_t the term's total count.
+
+    Args:
+        descriptions: Ticket descriptions
+        labels: Cluster label per description (-1 = noise, ignored)
+        top_n: Keywords to return per cluster
+
+    Returns:
+        Mapping of cluster label to keywords, best first
+    """
+    labels = np.asarray(labels)
+    keep = labels != -1
+    docs = [d or "" for d, k in zip(descriptions, keep) if k]
+    kept_labels = labels[keep]
+    if not docs:
+        return {}
+
+    unique_labels, inverse = np.unique(kept_labels, return_inverse=True)
+
+    vectorizer = CountVectorizer(
+        stop_words="english",
+        ngram_range=(1, 2),
+        token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z0-9_\-]+\b"
+    )
+    try:
+        counts = vectorizer.fit_transform(docs)
+    except ValueError:
+        # Empty vocabulary (e.g. only stop words or numbers)
+        return {int(label): [] for label in unique_labels}
+
+    # (n_clusters x n_docs) membership matrix -> per-cluster term counts
+    membership = sparse.csr_matrix(
+        (np.ones(len(docs)), (inverse, np.arange(len(docs)))),
+        shape=(len(unique_labels), len(docs))
+    )
+    class_counts = (membership @ counts).tocsr()
+
+    words_per_class = np.asarray(class_counts.sum(axis=1)).ravel().astype(float)
+    words_per_class[words_per_class == 0] = 1.0
+    term_totals = np.asarray(class_counts.sum(axis=0)).ravel().astype(float)
+
+    tf = sparse.diags(1.0 / words_per_class) @ class_counts
+    idf = np.log1p(words_per_class.mean() / np.maximum(term_totals, 1.0))
+    scores = (tf @ sparse.diags(idf)).tocsr()
+
+    vocabulary = vectorizer.get_feature_names_out()
+    keywords = {}
+    for row, label in enumerate(unique_labels):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        term_ids = scores.indices[start:end]
+        term_scores = scores.data[start:end]
+        best = term_ids[np.argsort(-term_scores, kind="stable")[:top_n]]
+        keywords[int(label)] = [str(vocabulary[t]) for t in best]
+
+    return keywords
+
+
+def keywords_to_name(keywords: list[str], max_words: int = 5) -> str:
+    """Build a short, readable cluster name from ranked keywords."""
+    words = []
+    for keyword in keywords:
+        for word in keyword.split():
+            if word not in words:
+                words.append(word)
+        if len(words) >= max_words:
+            break
+
+    if not words:
+        return "Uncategorized Issues"
+
+    return " ".join(w.capitalize() for w in words[:max_words])
@@ -0,0 +1,145 @@
+"""
+Knowledge index - In-process vector index of approved knowledge per org.
+
+Approved knowledge is small (hundreds to thousands of entries per org), so an
+exact dot-product search over a contiguous float32 matrix answers RAG queries
+in microseconds instead of a database round trip. Indexes are cached per org
+(see org_cache) and dropped on approve/reject. The pgvector search remains
+the fallback.
+"""
+import numpy as np
+
+from app.services import get_database_service
+from app.services.org_cache import OrgCache
+
+# Fields returned per match, same shape as the search_knowledge SQL function
+_RESULT_FIELDS = (
+    "id", "org_id", "category", "subcategory", "current_process",
+    "automation_level", "tools_used", "blockers", "resolution_steps",
+)
+
+
+class KnowledgeIndex:
+    """Row-normalized embedding matrix of an org's approved knowledge."""
+
+    def __init__(self, entries: list[dict]):
+        entries = [e for e in entries if e.get("embedding") is not None]
+        self.entries = [{f: e.get(f) for f in _RESULT_FIELDS} for e in entries]
+
+        if entries:
+            matrix = np.ascontiguousarray([e["embedding"] for e in entries], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.matrix = matrix / np.maximum(norms, 1e-12)
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, embedding: list[float], limit: int = 3, threshold: float = 0.7) -> list[dict]:
+        """Top-k entries by cosine similarity, above threshold, most similar first."""
+        if not self.entries or limit <= 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.matrix @ query
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {**self.entries[i], "similarity": float(scores[i])}
+            for i in top
+            if scores[i] > threshold
+        ]
+
+    def search_batch(self, embeddings, limit: int = 3, threshold: float = 0.7) -> list[list[dict]]:
+        """Top-k per query for many queries with a single matrix multiply."""
+        if not self.entries or limit <= 0:
+            return [[] for _ in range(len(embeddings))]
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self.matrix.T
+
+        k = min(limit, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [
+                {**self.entries[i], "similarity": float(score)}
+                for i, score in zip(row, row_scores)
+                if score > threshold
+            ]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+
+async def build_knowledge_index(org_id: str) -> KnowledgeIndex:
+    db = get_database_service()
+    return KnowledgeIndex(await db.get_knowledge_embeddings(org_id))
+
+
+_cache: OrgCache[KnowledgeIndex] = OrgCache(
+    build_knowledge_index,
+    ttl_setting="KNOWLEDGE_INDEX_TTL_SECONDS",
+    max_orgs_setting="KNOWLEDGE_INDEX_MAX_ORGS"
+)
+
+
+async def get_knowledge_index(org_id: str) -> KnowledgeIndex:
+    """Return the org's index, loading it from the database on first use or after expiry."""
+    return await _cache.get(org_id)
+
+
+def invalidate_knowledge_index(org_id: str) -> None:
+    """Drop an org's index after its approved knowledge changed."""
+    _cache.invalidate(org_id)
+
+
+async def search_knowledge(
+    org_id: str,
+    embedding: list[float],
+    limit: int = 3,
+    threshold: float = 0.7
+) -> list[dict]:
+    """Search approved knowledge in-process, falling back to the database search."""
+    try:
+        index = await get_knowledge_index(org_id)
+        return index.search(embedding, limit=limit, threshold=threshold)
+    except Exception:
+        db = get_database_service()
+        return await db.search_similar_knowledge(
+            org_id=org_id,
+            embedding=embedding,
+            limit=limit,
+            threshold=threshold
+        )
+
+
+async def search_knowledge_batch(
+    org_id: str,
+    embeddings: list[list[float]],
+    limit: int = 3,
+    threshold: float = 0.7
+) -> list[list[dict]]:
+    """Search approved knowledge for many query vectors at once (one result list per query)."""
+    if len(embeddings) == 0:
+        return []
+    try:
+        index = await get_knowledge_index(org_id)
+        return index.search_batch(embeddings, limit=limit, threshold=threshold)
+    except Exception:
+        db = get_database_service()
+        return await db.search_similar_knowledge_batch(
+            org_id=org_id,
+            embeddings=embeddings,
+            limit=limit,
+            threshold=threshold
+        )
@@ -0,0 +1,154 @@
+"""
+Lexical index - In-process BM25 inverted index over approved knowledge per org.
+
+Complements vector search for short, jargon-heavy entries ("SAP GUI lockout",
+"BitLocker key") whose embeddings score below the similarity threshold.
+Built lazily from the database, updated incrementally on approval, and
+cached per org (see org_cache) with the vector index's TTL and org cap.
+"""
+import asyncio
+import math
+import re
+import threading
+from collections import Counter
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from app.services import get_database_service
+from app.services.org_cache import OrgCache
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_\-\.]*[a-z0-9]|[a-z0-9]")
+
+# Fields returned per match, same shape as the vector search results
+_RESULT_FIELDS = (
+    "id", "org_id", "category", "subcategory", "current_process",
+    "automation_level", "tools_used", "blockers", "resolution_steps",
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens, keeping product-style tokens (e.g. "o365", "sap-gui")."""
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in ENGLISH_STOP_WORDS]
+
+
+def knowledge_text(entry: dict) -> str:
+    """Searchable text of a knowledge entry."""
+    return " ".join([
+        entry.get("category") or "",
+        entry.get("subcategory") or "",
+        entry.get("current_process") or "",
+        " ".join(entry.get("tools_used") or []),
+        entry.get("blockers") or "",
+    ])
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index (term -> {doc: term frequency})."""
+
+    def __init__(self, entries: list[dict] = (), k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[str, int]] = {}
+        self.doc_terms: dict[str, list[str]] = {}
+        self.doc_lengths: dict[str, int] = {}
+        self.entries: dict[str, dict] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()  # Searches run in worker threads
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: dict) -> None:
+        """Index an entry (re-indexing it if already present)."""
+        counts = Counter(tokenize(knowledge_text(entry)))
+        with self._lock:
+            self._remove(entry["id"])
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[entry["id"]] = tf
+            self.doc_terms[entry["id"]] = list(counts)
+            self.doc_lengths[entry["id"]] = sum(counts.values())
+            self.total_length += self.doc_lengths[entry["id"]]
+            self.entries[entry["id"]] = {f: entry.get(f) for f in _RESULT_FIELDS}
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        if doc_id not in self.entries:
+            return
+        for term in self.doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.entries[doc_id]
+
+    def search(self, query: str, limit: int = 3, min_score: float = 0.0) -> list[dict]:
+        """Top entries by BM25 score (at least min_score), best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.entries)
+            if not n_docs or limit <= 0:
+                return []
+
+            avg_length = self.total_length / n_docs or 1.0
+            scores: dict[str, float] = {}
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = sorted(
+                ((score, doc_id) for doc_id, score in scores.items() if score >= min_score),
+                reverse=True
+            )[:limit]
+            return [{**self.entries[doc_id], "bm25_score": score} for score, doc_id in best]
+
+
+async def build_lexical_index(org_id: str) -> BM25Index:
+    db = get_database_service()
+    entries = await db.get_knowledge_entries(org_id, status="approved")
+    return await asyncio.to_thread(BM25Index, entries)
+
+
+_cache: OrgCache[BM25Index] = OrgCache(
+    build_lexical_index,
+    ttl_setting="KNOWLEDGE_INDEX_TTL_SECONDS",
+    max_orgs_setting="KNOWLEDGE_INDEX_MAX_ORGS"
+)
+
+
+async def get_lexical_index(org_id: str) -> BM25Index:
+    """Return the org's BM25 index, building it from approved knowledge on first use or after expiry."""
+    return await _cache.get(org_id)
+
+
+async def add_to_lexical_index(org_id: str, entry: dict) -> None:
+    """Index newly approved knowledge in place (the next load picks it up if not loaded)."""
+    _cache.mark_changed(org_id)  # A load in flight may miss it: don't cache that snapshot
+    index = _cache.peek(org_id)
+    if index is not None:
+        # Off the event loop: the index lock may be held by a batch search in a worker thread
+        await asyncio.to_thread(index.add, entry)
+
+
+async def search_lexical_batch(
+    org_id: str,
+    queries: list[str],
+    limit: int = 3,
+    min_score: float = 0.0
+) -> list[list[dict]]:
+    """BM25 search for many query texts (one result list per query), off the event loop."""
+    if not queries:
+        return []
+    index = await get_lexical_index(org_id)
+    return await asyncio.to_thread(
+        lambda: [index.search(q, limit=limit, min_score=min_score) for q in queries]
+    )
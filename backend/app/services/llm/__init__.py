@@ -1,6 +1,11 @@
 # LLM service - Swappable LLM implementations
-from .base import LLMService
+from .base import LLMService, LLMTransientError, LLMOutputError
 from .azure_openai import AzureOpenAIService
+from .stub import StubLLMService
+from .scheduler import ScheduledLLMService, LLMPriority, llm_priority
+from .cache import CachedLLMService, llm_cache_refresh
+from .structured import chat_structured, parse_json_object, get_structured_output_metrics
+from .tokens import TokenUsage, count_tokens, fit_to_budget, truncate_to_tokens, track_token_usage, llm_call_type
 from app.config import get_settings
 
 # Singleton instance
@@ -13,14 +18,77 @@ def get_llm_service() -> LLMService:
     
     if _llm_service is None:
         settings = get_settings()
-        _llm_service = AzureOpenAIService(
-            endpoint=settings.AZURE_OPENAI_ENDPOINT,
-            api_key=settings.AZURE_OPENAI_API_KEY,
-            deployment=settings.AZURE_OPENAI_DEPLOYMENT,
-            api_version=settings.AZURE_OPENAI_API_VERSION
+        
+        if settings.LLM_PROVIDER == "stub":
+            # Offline, deterministic responses for load testing
+            provider = StubLLMService(
+                latency_ms=settings.STUB_LLM_LATENCY_MS,
+                latency_jitter_ms=settings.STUB_LLM_LATENCY_JITTER_MS,
+                error_rate=settings.STUB_LLM_ERROR_RATE,
+                rate_limit_rate=settings.STUB_LLM_RATE_LIMIT_RATE,
+                seed=settings.STUB_LLM_SEED
+            )
+        else:
+            provider = AzureOpenAIService(
+                endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                deployment=settings.AZURE_OPENAI_DEPLOYMENT,
+                api_version=settings.AZURE_OPENAI_API_VERSION,
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+                connect_timeout=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+                request_timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                max_retries=0  # Retries are handled by the scheduler
+            )
+        
+        # Quota-aware admission, priorities and retries in front of the provider
+        _llm_service = ScheduledLLMService(
+            provider,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_retries=settings.LLM_MAX_RETRIES
         )
+        
+        # Deterministic (temperature 0) responses are served from a local cache
+        if settings.LLM_CACHE_ENABLED:
+            _llm_service = CachedLLMService(
+                _llm_service,
+                deployment=settings.LLM_PROVIDER if settings.LLM_PROVIDER == "stub" else settings.AZURE_OPENAI_DEPLOYMENT,
+                path=settings.LLM_CACHE_PATH,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES
+            )
     
     return _llm_service
 
 
-__all__ = ["LLMService", "get_llm_service"]
+async def close_llm_service() -> None:
+    """Close the LLM service's connection pool (app shutdown)."""
+    global _llm_service
+    
+    if _llm_service is not None:
+        await _llm_service.close()
+        _llm_service = None
+
+
+__all__ = [
+    "LLMService",
+    "LLMTransientError",
+    "LLMOutputError",
+    "chat_structured",
+    "parse_json_object",
+    "get_structured_output_metrics",
+    "LLMPriority",
+    "llm_priority",
+    "llm_cache_refresh",
+    "TokenUsage",
+    "count_tokens",
+    "fit_to_budget",
+    "truncate_to_tokens",
+    "track_token_usage",
+    "llm_call_type",
+    "get_llm_service",
+    "close_llm_service",
+]
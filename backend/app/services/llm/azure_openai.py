@@ -1,10 +1,14 @@
 """
 Azure OpenAI implementation for LLM operations.
+Uses the async client over one pooled keep-alive HTTP connection pool,
+so concurrent calls overlap instead of blocking the event loop.
 """
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from typing import Optional
-import json
+import httpx
 from .base import LLMService
+from .structured import parse_json_object
+from .tokens import count_tokens, record_usage
 
 
 class AzureOpenAIService(LLMService):
@@ -15,14 +19,32 @@ class AzureOpenAIService(LLMService):
         endpoint: str, 
         api_key: str, 
         deployment: str,
-        api_version: str = "2024-02-15-preview"
+        api_version: str = "2024-02-15-preview",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        request_timeout: float = 60.0,
+        max_retries: int = 2
     ):
-        self.client = AzureOpenAI(
+        # Shared pool: TLS handshakes are paid once per connection, not per call
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(request_timeout, connect=connect_timeout)
+        )
+        self.client = AsyncAzureOpenAI(
             azure_endpoint=endpoint,
             api_key=api_key,
-            api_version=api_version
+            api_version=api_version,
+            http_client=self.http_client,
+            max_retries=max_retries
         )
         self.deployment = deployment
+        self.request_timeout = request_timeout
     
     async def chat(
         self, 
@@ -32,47 +54,70 @@ class AzureOpenAIService(LLMService):
         max_tokens: int = 2000
     ) -> str:
         """Generate a chat completion."""
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        messages.append({"role": "user", "content": prompt})
-        
-        response = self.client.chat.completions.create(
-            model=self.deployment,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        
-        return response.choices[0].message.content
+        return await self._complete(prompt, system_prompt, temperature, max_tokens)
     
     async def chat_json(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        max_tokens: int = 2000
     ) -> dict:
-        """Generate a chat completion and parse as JSON."""
-        # Add JSON instruction to system prompt
+        """Generate a chat completion in JSON mode and parse it."""
+        # JSON mode requires the word "JSON" in the messages
         json_system = "You are a helpful assistant that responds only in valid JSON format."
         if system_prompt:
             json_system = f"{system_prompt}\n\nIMPORTANT: Respond only in valid JSON format."
         
-        response = await self.chat(
-            prompt=prompt,
-            system_prompt=json_system,
-            temperature=temperature
+        response = await self._complete(
+            prompt,
+            json_system,
+            temperature,
+            max_tokens,
+            response_format={"type": "json_object"}
+        )
+        
+        # JSON mode makes this a plain json.loads; the repair path covers
+        # deployments without it and truncated completions
+        return parse_json_object(response)
+    
+    async def _complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[dict] = None
+    ) -> str:
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        extra = {"response_format": response_format} if response_format else {}
+        response = await self.client.chat.completions.create(
+            model=self.deployment,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=self.request_timeout,
+            **extra
         )
         
-        # Clean response and parse JSON
-        response = response.strip()
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
+        content = response.choices[0].message.content
         
-        return json.loads(response.strip())
+        # Account tokens as billed; estimate if the response carries no usage
+        if response.usage is not None:
+            record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        else:
+            record_usage(
+                sum(count_tokens(m["content"]) for m in messages),
+                count_tokens(content)
+            )
+        
+        return content
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.close()
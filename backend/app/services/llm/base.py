@@ -6,6 +6,19 @@ from abc import ABC, abstractmethod
 from typing import Optional
 
 
+class LLMTransientError(Exception):
+    """A retryable provider failure (rate limit, timeout, 5xx)."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None, rate_limited: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.rate_limited = rate_limited
+
+
+class LLMOutputError(ValueError):
+    """The model's output could not be parsed or validated as the expected structure."""
+
+
 class LLMService(ABC):
     """Abstract LLM service interface."""
     
@@ -36,7 +49,8 @@ class LLMService(ABC):
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        max_tokens: int = 2000
     ) -> dict:
         """
         Generate a chat completion and parse as JSON.
@@ -45,8 +59,17 @@ class LLMService(ABC):
             prompt: User prompt (should request JSON output)
             system_prompt: Optional system prompt
             temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
             
         Returns:
             Parsed JSON response as dict
         """
         pass
+    
+    def get_metrics(self) -> dict:
+        """Operational metrics (queue depth, throttling, ...). Empty by default."""
+        return {}
+    
+    async def close(self) -> None:
+        """Release network resources (connection pools). No-op by default."""
+        pass
@@ -0,0 +1,219 @@
+"""
+Persistent LLM response cache keyed by prompt fingerprint.
+
+Only deterministic calls (temperature == 0) are cached. Entries live in a
+local SQLite file with TTL and size-bounded LRU eviction, fronted by an
+in-memory LRU so repeated prompts return in microseconds. SQLite runs in
+worker threads to keep disk I/O off the event loop. Calls made inside
+llm_cache_refresh() skip lookups and overwrite the stored response.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from .base import LLMService
+from .tokens import record_cache_hit
+
+_refresh: ContextVar[bool] = ContextVar("llm_cache_refresh", default=False)
+
+
+@contextmanager
+def llm_cache_refresh():
+    """Regenerate the enclosed LLM calls instead of serving cached responses (the new ones are stored)."""
+    token = _refresh.set(True)
+    try:
+        yield
+    finally:
+        _refresh.reset(token)
+
+
+class CachedLLMService(LLMService):
+    """Wraps an LLMService with a local response cache for temperature-0 calls."""
+
+    def __init__(
+        self,
+        inner: LLMService,
+        deployment: str,
+        path: str,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 50000,
+        memory_entries: int = 2048
+    ):
+        self.inner = inner
+        self.deployment = deployment
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0, "bypassed": 0, "refreshed": 0, "evictions": 0}
+        self._db_lock = threading.Lock()  # One connection shared by worker threads
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+
+    async def chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> str:
+        return await self._cached(
+            ("chat", system_prompt, prompt, temperature, max_tokens),
+            temperature,
+            lambda: self.inner.chat(prompt, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens)
+        )
+
+    async def chat_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> dict:
+        return await self._cached(
+            ("chat_json", system_prompt, prompt, temperature, max_tokens),
+            temperature,
+            lambda: self.inner.chat_json(prompt, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens)
+        )
+
+    def fingerprint(self, parts: tuple) -> str:
+        """Hash of (deployment, call kind, system prompt, prompt, temperature, max_tokens)."""
+        return hashlib.sha256(json.dumps([self.deployment, *parts]).encode()).hexdigest()
+
+    async def _cached(self, parts: tuple, temperature: float, call):
+        if temperature != 0:
+            self._metrics["bypassed"] += 1
+            return await call()
+
+        key = self.fingerprint(parts)
+        if _refresh.get():
+            self._metrics["refreshed"] += 1
+            value = await call()
+            await self._put(key, copy.deepcopy(value))
+            return value
+
+        hit, value = await self._get(key)
+        if hit:
+            record_cache_hit()
+            return copy.deepcopy(value)  # Callers may mutate parsed JSON
+
+        # Identical concurrent misses share one upstream call
+        if key in self._in_flight:
+            self._metrics["coalesced"] += 1
+            record_cache_hit()
+            return copy.deepcopy(await asyncio.shield(self._in_flight[key]))
+
+        self._metrics["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await call()
+            await self._put(key, copy.deepcopy(value))
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _get(self, key: str) -> tuple[bool, object]:
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry and entry[0] > now:
+            self._memory.move_to_end(key)
+            self._metrics["memory_hits"] += 1
+            return True, entry[1]
+
+        row = await asyncio.to_thread(self._read, key, now)
+        if not row:
+            return False, None
+
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        self._metrics["disk_hits"] += 1
+        return True, value
+
+    async def _put(self, key: str, value) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, expires_at, value)
+        self._metrics["evictions"] += await asyncio.to_thread(self._write, key, json.dumps(value), expires_at, now)
+
+    def _read(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row:
+                self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row
+
+    def _write(self, key: str, value: str, expires_at: float, now: float) -> int:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            return self._evict()
+
+    def _remember(self, key: str, expires_at: float, value) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> int:
+        """Drop least recently used rows beyond max_entries; returns how many."""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,)
+            )
+        return max(excess, 0)
+
+    def get_metrics(self) -> dict:
+        # Callers that joined an identical in-flight call were served without a provider call too
+        hits = self._metrics["memory_hits"] + self._metrics["disk_hits"] + self._metrics["coalesced"]
+        lookups = hits + self._metrics["misses"]
+        return {
+            **self.inner.get_metrics(),
+            "cache": {
+                **self._metrics,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+        }
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close_db)
+        await self.inner.close()
+
+    def _close_db(self) -> None:
+        with self._db_lock:
+            self._db.close()
@@ -0,0 +1,271 @@
+"""
+Rate-limit-aware scheduler in front of any LLMService.
+
+Admission is gated by two token buckets (requests/min and counted
+tokens/min) matching the deployment's quota. Waiting calls are served in
+priority order (interactive before background work), 429s pause admission
+for the Retry-After period, and transient failures are retried with
+jittered exponential backoff.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Optional
+
+import openai
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from .base import LLMService, LLMTransientError
+from .tokens import count_tokens
+
+
+class LLMPriority(IntEnum):
+    """Lower value = admitted first."""
+    INTERACTIVE = 0  # A user is waiting on the response
+    BULK = 5         # Bulk assessment jobs
+    BACKGROUND = 10  # Cluster naming, precomputation
+
+
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=LLMPriority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: LLMPriority):
+    """Run the enclosed LLM calls (including tasks spawned inside) at the given priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to a per-minute quota."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        """Empty the bucket after the server reported we are over quota."""
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by the server (Retry-After / retry-after-ms), if any."""
+    if isinstance(exc, LLMTransientError):
+        return exc.retry_after
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    return isinstance(exc, openai.RateLimitError) or (
+        isinstance(exc, LLMTransientError) and exc.rate_limited
+    )
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        LLMTransientError,
+    ))
+
+
+class ScheduledLLMService(LLMService):
+    """Wraps an LLMService with quota-aware, prioritised admission and retries."""
+
+    def __init__(
+        self,
+        inner: LLMService,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int = 5,
+        max_backoff: float = 30.0
+    ):
+        self.inner = inner
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self._queue: list[list] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        self._backoff = wait_random_exponential(multiplier=1, max=max_backoff)
+        self._metrics = {
+            "admitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "throttled": 0,
+            "in_flight": 0,
+            "admission_wait_seconds": 0.0,
+        }
+
+    async def chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> str:
+        tokens = count_tokens(prompt) + count_tokens(system_prompt) + max_tokens
+        return await self._run(
+            lambda: self.inner.chat(prompt, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens),
+            tokens
+        )
+
+    async def chat_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> dict:
+        tokens = count_tokens(prompt) + count_tokens(system_prompt) + max_tokens
+        return await self._run(
+            lambda: self.inner.chat_json(prompt, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens),
+            tokens
+        )
+
+    async def _run(self, call, tokens: int):
+        """Admit, execute and (on transient failure) retry one LLM call."""
+        priority = _current_priority.get()
+
+        retrying = AsyncRetrying(
+            retry=retry_if_exception(_is_retryable),
+            wait=self._wait,
+            stop=stop_after_attempt(self.max_retries + 1),
+            before_sleep=self._before_retry,
+            reraise=True
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    await self._acquire(tokens, priority)
+                    self._metrics["in_flight"] += 1
+                    try:
+                        result = await call()
+                    except Exception as e:
+                        if _is_rate_limited(e):
+                            self._throttle(_retry_after(e))
+                        raise
+                    finally:
+                        self._metrics["in_flight"] -= 1
+        except Exception:
+            self._metrics["failed"] += 1
+            raise
+
+        self._metrics["completed"] += 1
+        return result
+
+    async def _acquire(self, tokens: int, priority: int) -> None:
+        """Wait until this call is first in priority order and both buckets have room."""
+        started = time.monotonic()
+        entry = [priority, next(self._sequence)]
+
+        async with self._condition:
+            heapq.heappush(self._queue, entry)
+            self._condition.notify_all()
+            try:
+                while True:
+                    if self._queue[0] is entry:
+                        delay = max(
+                            self._requests.wait_time(1),
+                            self._tokens.wait_time(tokens),
+                            self._paused_until - time.monotonic()
+                        )
+                        if delay <= 0:
+                            heapq.heappop(self._queue)
+                            self._requests.consume(1)
+                            self._tokens.consume(tokens)
+                            self._condition.notify_all()
+                            break
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await self._condition.wait()
+            except BaseException:
+                # Cancelled while queued: leave the queue consistent for the others
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._condition.notify_all()
+                raise
+
+        self._metrics["admitted"] += 1
+        self._metrics["admission_wait_seconds"] += time.monotonic() - started
+
+    def _throttle(self, retry_after: Optional[float]) -> None:
+        """Server said 429: stop admitting everyone until Retry-After has passed."""
+        self._metrics["throttled"] += 1
+        self._requests.drain()
+        self._tokens.drain()
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def _wait(self, retry_state) -> float:
+        """Honour Retry-After when given (plus jitter), otherwise jittered exponential backoff."""
+        retry_after = _retry_after(retry_state.outcome.exception())
+        if retry_after is not None:
+            return min(retry_after + random.uniform(0, 1), self.max_backoff)
+        return self._backoff(retry_state)
+
+    def _before_retry(self, retry_state) -> None:
+        self._metrics["retries"] += 1
+
+    def get_metrics(self) -> dict:
+        admitted = self._metrics["admitted"]
+        return {
+            **self.inner.get_metrics(),
+            "scheduler": {
+                **self._metrics,
+                "queue_depth": len(self._queue),
+                "avg_admission_wait_seconds": (
+                    self._metrics["admission_wait_seconds"] / admitted if admitted else 0.0
+                ),
+                "paused_for_seconds": max(0.0, self._paused_until - time.monotonic()),
+                "requests_available": round(self._requests.level, 1),
+                "tokens_available": round(self._tokens.level, 1),
+            }
+        }
+
+    async def close(self) -> None:
+        await self.inner.close()
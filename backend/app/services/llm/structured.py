@@ -0,0 +1,184 @@
+"""
+Structured (JSON) output handling for LLM responses.
+
+Extracts and repairs the JSON object from noisy model output, validates it
+against a Pydantic model, and re-asks only for the fields that are missing or
+invalid instead of rerunning the whole generation.
+"""
+import json
+import re
+from typing import Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .base import LLMOutputError
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PYTHON_LITERALS = re.compile(r"\b(True|False|None)\b")
+
+_metrics = {
+    "parsed": 0,
+    "repaired": 0,
+    "parse_failures": 0,
+    "validation_failures": 0,
+    "reasks": 0,
+    "reask_recovered": 0,
+    "exhausted": 0,
+}
+
+
+def parse_json_object(text: str) -> dict:
+    """
+    Parse the first JSON object in text, tolerating code fences, surrounding
+    prose, trailing commas, smart quotes, Python literals and truncation.
+    
+    Raises:
+        LLMOutputError: If no JSON object can be recovered
+    """
+    text = (text or "").strip()
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            _metrics["parsed"] += 1
+            return value
+    except json.JSONDecodeError:
+        pass
+    
+    fenced = _FENCE.search(text)
+    candidate = _balanced_object(fenced.group(1) if fenced else text)
+    if candidate is not None:
+        for repair in (lambda s: s, _repair):
+            try:
+                value = json.loads(repair(candidate), strict=False)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                _metrics["repaired"] += 1
+                return value
+    
+    _metrics["parse_failures"] += 1
+    raise LLMOutputError(f"No JSON object found in model output: {text[:200]!r}")
+
+
+def _balanced_object(text: str) -> Optional[str]:
+    """Slice from the first '{' to its matching '}', closing brackets if the output was cut off."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    
+    stack = []
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                return text[start:i + 1]
+    
+    # Truncated output: close the open string and brackets
+    return text[start:] + ('"' if in_string else "") + "".join(reversed(stack))
+
+
+def _repair(text: str) -> str:
+    text = text.translate(_SMART_QUOTES)
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    return _PYTHON_LITERALS.sub(lambda m: {"True": "true", "False": "false", "None": "null"}[m.group(1)], text)
+
+
+async def chat_structured(
+    llm,
+    prompt: str,
+    model: Type[T],
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 2000,
+    max_reasks: int = 1
+) -> T:
+    """
+    Ask for a JSON object and validate it against `model`.
+    
+    Missing or invalid fields are re-requested on their own (with the original
+    prompt and the partial answer as context), so a single bad field does not
+    cost a full regeneration.
+    
+    Raises:
+        LLMOutputError: If the fields are still invalid after max_reasks follow-ups,
+            or validation fails without naming a field that could be re-asked
+    """
+    try:
+        data = await llm.chat_json(prompt, system_prompt=system_prompt, max_tokens=max_tokens)
+    except LLMOutputError:
+        data = {}
+    
+    for attempt in range(max_reasks + 1):
+        try:
+            result = model.model_validate(data)
+            if attempt:
+                _metrics["reask_recovered"] += 1
+            return result
+        except ValidationError as e:
+            _metrics["validation_failures"] += 1
+            invalid = sorted({str(err["loc"][0]) for err in e.errors() if err["loc"]} & model.model_fields.keys())
+            error = e
+        
+        # Nothing to re-ask for (e.g. a model-level validator failed)
+        if not invalid:
+            _metrics["exhausted"] += 1
+            raise LLMOutputError(f"Model output failed validation: {error}")
+        if attempt == max_reasks:
+            break
+        
+        data = {k: v for k, v in data.items() if k in model.model_fields and k not in invalid}
+        _metrics["reasks"] += 1
+        try:
+            fix = await llm.chat_json(
+                _reask_prompt(prompt, model, data, invalid),
+                system_prompt=system_prompt,
+                max_tokens=max_tokens
+            )
+        except LLMOutputError:
+            fix = {}
+        data.update({k: v for k, v in fix.items() if k in invalid})
+    
+    _metrics["exhausted"] += 1
+    raise LLMOutputError(f"Model output failed validation for fields: {', '.join(invalid)}")
+
+
+def _reask_prompt(prompt: str, model: Type[BaseModel], partial: dict, fields: list[str]) -> str:
+    schema = model.model_json_schema()
+    wanted = {"properties": {f: schema["properties"][f] for f in fields if f in schema["properties"]}}
+    if "$defs" in schema:
+        wanted["$defs"] = schema["$defs"]
+    
+    return f"""{prompt}
+
+Your previous answer was incomplete. Valid fields so far:
+{json.dumps(partial, indent=2)}
+
+Provide ONLY the missing or invalid fields ({', '.join(fields)}) as a JSON object matching this schema:
+{json.dumps(wanted, indent=2)}"""
+
+
+def get_structured_output_metrics() -> dict:
+    """Parse/validation counters and the share of responses that could not be parsed."""
+    responses = _metrics["parsed"] + _metrics["repaired"] + _metrics["parse_failures"]
+    return {
+        **_metrics,
+        "parse_failure_rate": round(_metrics["parse_failures"] / responses, 4) if responses else 0.0,
+    }
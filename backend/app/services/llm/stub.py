@@ -0,0 +1,127 @@
+"""
+Deterministic local LLM stub - no network, no credentials.
+Lets naming, assessment and ingestion be load-tested in isolation, with
+configurable artificial latency and error rates.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections import Counter
+from typing import Optional
+
+from .base import LLMService, LLMTransientError
+from .tokens import count_tokens, record_usage
+
+_STOP_WORDS = {
+    "the", "and", "for", "with", "not", "this", "that", "from", "are", "was",
+    "cannot", "can", "has", "have", "issue", "issues", "ticket", "tickets",
+    "cluster", "name", "based", "these", "descriptions", "representative",
+    "generate", "short", "descriptive", "max", "words", "respond", "only",
+    "nothing", "else", "distinctive", "keywords", "sample", "user", "please",
+}
+
+_LEVELS = ("manual", "semi_automatable", "fully_automatable")
+_STEP_CLASSES = ("auto", "semi", "manual")
+
+
+class StubLLMService(LLMService):
+    """Offline LLMService returning deterministic, schema-valid responses."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency_ms: Artificial latency added to every call
+            latency_jitter_ms: Uniform +/- jitter on top of latency_ms
+            error_rate: Fraction of calls failing with a retryable LLMTransientError (timeout / 5xx)
+            rate_limit_rate: Fraction of calls rejected as rate limited (429), which throttles the scheduler
+            seed: Seed for latency/error randomness (content depends only on the prompt)
+        """
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    async def chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> str:
+        """Return a short name built from the prompt's most frequent words."""
+        await self._simulate()
+
+        keywords = re.search(r"Distinctive keywords:\s*(.+)", prompt)
+        text = keywords.group(1) if keywords else prompt
+        words = [
+            w.lower() for w in re.findall(r"[A-Za-z][A-Za-z0-9]{2,}", text)
+            if w.lower() not in _STOP_WORDS
+        ]
+        top = [w for w, _ in Counter(words).most_common(3)]
+        name = " ".join(w.capitalize() for w in top) or "General Requests"
+        record_usage(count_tokens(prompt) + count_tokens(system_prompt), count_tokens(name))
+        return name
+
+    async def chat_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 2000
+    ) -> dict:
+        """Return an assessment-shaped JSON object derived from a hash of the prompt."""
+        await self._simulate()
+
+        digest = hashlib.sha256(f"{system_prompt or ''}\n{prompt}".encode()).digest()
+        potential = 10 + digest[0] % 81
+        level = _LEVELS[min(potential // 34, 2)]
+        name = re.search(r"Name:\s*(.+)", prompt)
+        subject = name.group(1).strip() if name else "this cluster"
+
+        result = {
+            "summary": f"Stub assessment of {subject}.",
+            "automation_potential": potential,
+            "automation_level": level,
+            "confidence": ("high", "medium", "low")[digest[1] % 3],
+            "recommendation": f"Automate the repetitive steps of {subject}.",
+            "resolution_steps": [
+                {
+                    "step": f"Step {i + 1} for {subject}",
+                    "classification": _STEP_CLASSES[digest[2 + i] % 3],
+                    "reason": "Deterministic stub output"
+                }
+                for i in range(2 + digest[5] % 3)
+            ]
+        }
+        record_usage(count_tokens(prompt) + count_tokens(system_prompt), count_tokens(json.dumps(result)))
+        return result
+
+    async def _simulate(self) -> None:
+        """Sleep for the configured latency and fail / rate limit at the configured rates."""
+        self.calls += 1
+        delay = self.latency_ms + self._random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise LLMTransientError("Simulated stub LLM rate limit (429)", retry_after=1.0, rate_limited=True)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise LLMTransientError("Simulated stub LLM failure")
+
+    def get_metrics(self) -> dict:
+        return {"stub": {"calls": self.calls, "errors": self.errors, "rate_limited": self.rate_limited}}
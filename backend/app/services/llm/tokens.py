@@ -0,0 +1,125 @@
+"""
+Token counting, prompt budgeting and usage accounting for LLM calls.
+
+Usage is accumulated per context: wrap a job in track_token_usage() and every
+LLM call made inside it (including concurrent tasks it spawns) is recorded
+against that job, broken down by call type.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Not installed, or encoding files unavailable offline
+    _encoding = None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count tokens with tiktoken when available, else estimate (~4 chars/token)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def fit_to_budget(parts: list[str], budget: int, min_part_tokens: int = 20) -> list[str]:
+    """
+    Keep parts (most important first) until the token budget is spent.
+    The first part that does not fit is truncated if a useful amount of it fits.
+    """
+    kept = []
+    remaining = budget
+    for part in parts:
+        tokens = count_tokens(part)
+        if tokens <= remaining:
+            kept.append(part)
+            remaining -= tokens
+            continue
+        if remaining >= min_part_tokens:
+            kept.append(truncate_to_tokens(part, remaining))
+        break
+    return kept
+
+
+@dataclass
+class TokenUsage:
+    """Accumulated token usage, in total and per call type."""
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    by_call_type: dict = field(default_factory=dict)
+
+    def add(self, call_type: str, prompt_tokens: int, completion_tokens: int) -> None:
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        bucket = self.by_call_type.setdefault(
+            call_type, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        bucket["calls"] += 1
+        bucket["prompt_tokens"] += prompt_tokens
+        bucket["completion_tokens"] += completion_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "by_call_type": self.by_call_type,
+        }
+
+
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_token_usage", default=None)
+_current_call_type: ContextVar[str] = ContextVar("llm_call_type", default="other")
+
+
+@contextmanager
+def track_token_usage():
+    """Accumulate usage of all LLM calls made inside the block into a TokenUsage."""
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+@contextmanager
+def llm_call_type(call_type: str):
+    """Label the enclosed LLM calls (e.g. "cluster_naming", "assessment") for accounting."""
+    token = _current_call_type.set(call_type)
+    try:
+        yield
+    finally:
+        _current_call_type.reset(token)
+
+
+def record_usage(prompt_tokens: int, completion_tokens: int) -> None:
+    """Called by providers after every upstream completion."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(_current_call_type.get(), prompt_tokens, completion_tokens)
+
+
+def record_cache_hit() -> None:
+    """Called when a response is served from cache (no tokens spent)."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.cached_calls += 1
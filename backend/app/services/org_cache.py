@@ -0,0 +1,88 @@
+"""
+Org cache - Per-org in-process cache of lazily built indexes.
+
+Backs the knowledge, BM25 and centroid indexes: each org's entry is built on
+first use, served until it is older than its TTL (which bounds staleness
+across workers), and evicted least recently used first beyond a maximum
+number of orgs. A generation counter per org keeps a build that raced with a
+change from being cached.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from app.config import get_settings
+
+T = TypeVar("T")
+
+
+class OrgCache(Generic[T]):
+    """TTL + LRU cache of one value per org, built by an async build(org_id)."""
+
+    def __init__(self, build: Callable[[str], Awaitable[T]], ttl_setting: str, max_orgs_setting: str):
+        self._build = build
+        self._ttl_setting = ttl_setting
+        self._max_orgs_setting = max_orgs_setting
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()  # Least recently used first
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._generations: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, org_id: str) -> T:
+        """Return the org's value, building it on first use or after expiry."""
+        settings = get_settings()
+        ttl = getattr(settings, self._ttl_setting)
+        entry = self._fresh(org_id, ttl)
+        if entry is not None:
+            return entry[1]
+
+        lock = self._locks.setdefault(org_id, asyncio.Lock())
+        async with lock:
+            entry = self._fresh(org_id, ttl)
+            if entry is not None:
+                return entry[1]
+
+            generation = self._generations.get(org_id, 0)
+            started = time.monotonic()
+            value = await self._build(org_id)
+
+            # Don't cache a snapshot that changed while it was building
+            if self._generations.get(org_id, 0) == generation:
+                self._entries[org_id] = (started, value)
+                self._entries.move_to_end(org_id)
+                self._evict(getattr(settings, self._max_orgs_setting))
+            return value
+
+    def peek(self, org_id: str) -> Optional[T]:
+        """The org's cached value, if any, without building or refreshing it."""
+        entry = self._entries.get(org_id)
+        return entry[1] if entry is not None else None
+
+    def mark_changed(self, org_id: str) -> None:
+        """Keep a build in flight from caching a snapshot taken before this change."""
+        if org_id in self._locks:  # Only a build that has started can be affected
+            self._generations[org_id] = self._generations.get(org_id, 0) + 1
+
+    def invalidate(self, org_id: str) -> None:
+        """Drop the org's value after its source data changed."""
+        self.mark_changed(org_id)
+        self._entries.pop(org_id, None)
+
+    def _fresh(self, org_id: str, ttl: float) -> Optional[tuple[float, T]]:
+        entry = self._entries.get(org_id)
+        if entry is None or time.monotonic() - entry[0] >= ttl:
+            return None
+        self._entries.move_to_end(org_id)
+        return entry
+
+    def _evict(self, max_orgs: int) -> None:
+        """Drop least recently used values (and their bookkeeping) beyond max_orgs."""
+        while len(self._entries) > max_orgs:
+            org_id, _ = self._entries.popitem(last=False)
+            lock = self._locks.get(org_id)
+            if lock is None or not lock.locked():  # A build in flight still needs them
+                self._locks.pop(org_id, None)
+                self._generations.pop(org_id, None)
@@ -1,5 +1,16 @@
-"""RAG service - Retrieval Augmented Generation for assessments."""
-from app.services import get_database_service, get_embedding_service
+"""
+RAG service - Retrieval Augmented Generation for assessments.
+
+Knowledge is retrieved by vector similarity and, when RAG_HYBRID_ENABLED, by
+BM25 keyword match as well; the two rankings are merged with reciprocal rank
+fusion so short, jargon-heavy entries are found even below the cosine threshold.
+"""
+import asyncio
+from app.config import get_settings
+from app.services import get_embedding_service
+from app.services.knowledge_index import search_knowledge_batch
+from app.services.lexical_index import search_lexical_batch
+from app.utils.helpers import parse_vector
 
 
 async def retrieve_relevant_knowledge(
@@ -9,34 +20,113 @@ async def retrieve_relevant_knowledge(
     threshold: float = 0.7
 ) -> list[dict]:
     """
-    Retrieve relevant knowledge entries using vector similarity.
+    Retrieve relevant knowledge entries using vector (and keyword) similarity.
     
     Args:
         org_id: Organization ID for isolation
         query_text: Text to find similar knowledge for
         limit: Max entries to return
-        threshold: Minimum similarity threshold
+        threshold: Minimum similarity threshold (vector matches)
     
     Returns:
         List of relevant knowledge entries
     """
-    db = get_database_service()
     embedding_service = get_embedding_service()
     
-    # Generate embedding for query
-    query_embedding = await embedding_service.embed_text(query_text)
-    
-    # Search for similar knowledge
-    results = await db.search_similar_knowledge(
-        org_id=org_id,
-        embedding=query_embedding,
-        limit=limit,
-        threshold=threshold
-    )
+    async def vector_search():
+        query_embedding = await embedding_service.embed_text(query_text)
+        return await retrieve_knowledge_batch(org_id, [query_embedding], limit=limit, threshold=threshold)
     
+    [results] = await hybrid_search(org_id, [query_text], vector_search(), limit=limit)
     return results
 
 
+async def retrieve_knowledge_batch(
+    org_id: str,
+    embeddings: list[list[float]],
+    limit: int = 3,
+    threshold: float = 0.7
+) -> list[list[dict]]:
+    """
+    Retrieve relevant knowledge for many query vectors at once.
+    
+    All queries are scored against the org's knowledge in a single matrix
+    multiply (one SQL call when falling back to the database).
+    
+    Returns:
+        One list of knowledge entries per query, most similar first
+    """
+    return await search_knowledge_batch(org_id, embeddings, limit=limit, threshold=threshold)
+
+
+async def retrieve_knowledge_for_clusters(
+    org_id: str,
+    clusters: list[dict],
+    limit: int = 3,
+    threshold: float = 0.7
+) -> list[list[dict]]:
+    """
+    Retrieve relevant knowledge for each cluster.
+    
+    Stored centroids are used as query vectors directly; only clusters without
+    one are embedded (from name + summary), in a single batch.
+    """
+    async def vector_search():
+        embeddings = [parse_vector(c.get("centroid")) for c in clusters]
+        
+        missing = [i for i, e in enumerate(embeddings) if not e]
+        if missing:
+            embedding_service = get_embedding_service()
+            texts = [cluster_texts[i] for i in missing]
+            for i, embedding in zip(missing, await embedding_service.embed_texts(texts)):
+                embeddings[i] = embedding
+        
+        return await retrieve_knowledge_batch(org_id, embeddings, limit=limit, threshold=threshold)
+    
+    cluster_texts = [f"{c.get('auto_name', '')} {c.get('summary', '')}" for c in clusters]
+    return await hybrid_search(org_id, cluster_texts, vector_search(), limit=limit)
+
+
+async def hybrid_search(org_id: str, query_texts: list[str], vector_search, limit: int = 3) -> list[list[dict]]:
+    """
+    Run the vector search (awaitable of per-query results) and BM25 over
+    query_texts concurrently, then fuse each query's two rankings.
+    """
+    settings = get_settings()
+    if not settings.RAG_HYBRID_ENABLED:
+        return await vector_search
+    
+    async def lexical_search():
+        try:
+            return await search_lexical_batch(
+                org_id, query_texts, limit=limit, min_score=settings.RAG_LEXICAL_MIN_SCORE
+            )
+        except Exception:
+            return [[] for _ in query_texts]  # Keyword matches are best-effort
+    
+    vector_sets, lexical_sets = await asyncio.gather(vector_search, lexical_search())
+    return [
+        reciprocal_rank_fusion([vector, lexical], limit=limit, k=settings.RAG_RRF_K)
+        for vector, lexical in zip(vector_sets, lexical_sets)
+    ]
+
+
+def reciprocal_rank_fusion(rankings: list[list[dict]], limit: int = 3, k: int = 60) -> list[dict]:
+    """
+    Merge ranked result lists: each entry scores sum(1 / (k + rank)) over the
+    lists it appears in. Entries keep the fields of their first occurrence.
+    """
+    scores: dict[str, float] = {}
+    entries: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, entry in enumerate(ranking, start=1):
+            scores[entry["id"]] = scores.get(entry["id"], 0.0) + 1.0 / (k + rank)
+            entries.setdefault(entry["id"], entry)
+    
+    best = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [{**entries[entry_id], "rrf_score": scores[entry_id]} for entry_id in best]
+
+
 def build_context_from_knowledge(knowledge_entries: list[dict]) -> str:
     """Build context string from retrieved knowledge for LLM prompt."""
     if not knowledge_entries:
@@ -1,6 +1,10 @@
 """Utility helper functions."""
+import base64
+import binascii
+import json
 import uuid
 from datetime import datetime
+from typing import Optional
 
 
 def generate_id() -> str:
@@ -13,6 +17,35 @@ def now_iso() -> str:
     return datetime.utcnow().isoformat()
 
 
+def parse_vector(value) -> list[float]:
+    """Parse a pgvector value, which PostgREST returns as a '[0.1,0.2,...]' string."""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def encode_cursor(row: dict, keys: tuple[str, ...]) -> str:
+    """Opaque keyset-pagination cursor: the sort-key values of the last row of a page."""
+    values = [row[k].isoformat() if isinstance(row[k], datetime) else row[k] for k in keys]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: tuple[str, ...]) -> dict:
+    """Sort-key values of a cursor; raises ValueError if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Invalid cursor")
+    return dict(zip(keys, values))
+
+
+def next_page_cursor(rows: list[dict], limit: Optional[int], keys: tuple[str, ...]) -> Optional[str]:
+    """Cursor for the page after rows, or None when rows is the last page."""
+    if not limit or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1], keys)
+
+
 def calculate_automation_percentage(steps: list[dict]) -> float:
     """
     Calculate automation percentage from resolution steps.
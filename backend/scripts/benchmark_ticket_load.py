@@ -0,0 +1,114 @@
+"""
+Benchmark the COPY-based ticket load path against row-by-row inserts.
+
+Generates synthetic tickets (random 384-d embeddings, small raw_data) for a
+throwaway organization and loads them through PostgresDatabaseService:
+"copy" streams batches via binary COPY into tickets_staging and merges each,
+"insert" uses the executemany insert path. The organization is deleted
+afterwards (cascading to its tickets). Target: > 50k rows/s for "copy".
+
+Every embedded row also pays an HNSW index insert on tickets.embedding, which
+dominates at this scale; pass --no-embeddings to measure the load path alone.
+
+Usage:
+    python scripts/benchmark_ticket_load.py --dsn postgresql://... \
+        --rows 100000 --batch-size 5000 --modes copy,insert
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import asyncpg
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.database.postgres import PostgresDatabaseService  # noqa: E402
+
+TARGET_ROWS_PER_SECOND = 50_000
+
+
+def make_batches(org_id: str, upload_id: str, rows: int, batch_size: int, embeddings: bool) -> list[list[dict]]:
+    rng = np.random.default_rng(0)
+    now = datetime.now(timezone.utc)
+    batches = []
+    for start in range(0, rows, batch_size):
+        n = min(batch_size, rows - start)
+        vectors = rng.normal(size=(n, 384)).astype(np.float32) if embeddings else None
+        batch = []
+        for i in range(n):
+            number = start + i
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "org_id": org_id,
+                "upload_id": upload_id,
+                "ticket_id": f"INC{number:07d}",
+                "description": f"User cannot access shared mailbox after password reset ({number})",
+                "category": "Email",
+                "subcategory": "Access",
+                "priority": "P3",
+                "raw_data": {"Number": f"INC{number:07d}", "Assignment group": "Service Desk"},
+                "embedding": vectors[i] if embeddings else None,
+                "created_at": now,
+            })
+        batches.append(batch)
+    return batches
+
+
+async def stream(batches: list[list[dict]]):
+    for batch in batches:
+        yield batch
+
+
+async def main(args) -> None:
+    conn = await asyncpg.connect(args.dsn)
+    db = PostgresDatabaseService(dsn=args.dsn)
+    org_id = str(await conn.fetchval("INSERT INTO organizations (name) VALUES ('load benchmark') RETURNING id"))
+    try:
+        print(f"{args.rows} tickets, batch size {args.batch_size}, embeddings {'on' if args.embeddings else 'off'}")
+        print(f"{'mode':<10}{'seconds':>10}{'rows/s':>12}")
+        for mode in args.modes:
+            upload_id = str(await conn.fetchval(
+                "INSERT INTO uploads (org_id, filename) VALUES ($1, $2) RETURNING id", org_id, f"benchmark-{mode}.csv"
+            ))
+            batches = make_batches(org_id, upload_id, args.rows, args.batch_size, args.embeddings)
+
+            started = time.perf_counter()
+            if mode == "copy":
+                loaded = await db.load_tickets(stream(batches))
+            else:
+                loaded = 0
+                for batch in batches:
+                    await db.insert_tickets(batch)
+                    loaded += len(batch)
+            elapsed = time.perf_counter() - started
+
+            stored = await conn.fetchval("SELECT COUNT(*) FROM tickets WHERE upload_id = $1", upload_id)
+            if stored != loaded:
+                raise SystemExit(f"{mode}: loaded {loaded} rows but {stored} are stored")
+            rate = loaded / elapsed
+            note = "" if mode != "copy" else ("  (target met)" if rate >= TARGET_ROWS_PER_SECOND else "  (below target)")
+            print(f"{mode:<10}{elapsed:>10.2f}{rate:>12,.0f}{note}")
+    finally:
+        await conn.execute("DELETE FROM organizations WHERE id = $1", org_id)
+        await conn.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres DSN (default: $DATABASE_URL)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=["copy", "insert"])
+    parser.add_argument("--no-embeddings", dest="embeddings", action="store_false")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    if set(args.modes) - {"copy", "insert"}:
+        parser.error("--modes must be copy and/or insert")
+    asyncio.run(main(args))
@@ -0,0 +1,126 @@
+"""
+Benchmark HNSW vector search against exact search.
+
+For a sample of stored vectors (perturbed with noise, so the query itself is
+not trivially the top hit) this runs the same ORDER BY distance LIMIT k query
+twice: once exactly (index scans disabled) and once through the HNSW index at
+each ef_search value, then reports recall@k and latency percentiles.
+
+Usage:
+    python scripts/benchmark_vector_search.py --dsn postgresql://... \
+        --table tickets --k 10 --queries 200 --ef-search 10,20,40,80,160
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+import numpy as np
+
+# --table choice -> (table, vector column, extra filter)
+TARGETS = {
+    "knowledge": ("knowledge_entries", "embedding", "AND status = 'approved'"),
+    "tickets": ("tickets", "embedding", ""),
+    "clusters": ("clusters", "centroid", ""),
+}
+
+
+def to_pgvector(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+async def sample_queries(conn, table: str, column: str, where: str, org_id: str, n: int, noise: float) -> list[str]:
+    rows = await conn.fetch(
+        f"SELECT {column}::text AS v FROM {table} "
+        f"WHERE {column} IS NOT NULL AND ($1::uuid IS NULL OR org_id = $1::uuid) {where} "
+        f"ORDER BY random() LIMIT $2",
+        org_id, n
+    )
+    rng = np.random.default_rng(0)
+    queries = []
+    for row in rows:
+        vector = np.array([float(x) for x in row["v"].strip("[]").split(",")], dtype=np.float32)
+        vector += rng.normal(0, noise, size=vector.shape).astype(np.float32)
+        queries.append(to_pgvector(vector))
+    return queries
+
+
+async def run_query(conn, sql: str, query: str, org_id: str, k: int, settings: list[str]) -> tuple[list, float]:
+    async with conn.transaction():
+        for setting in settings:
+            await conn.execute(setting)
+        started = time.perf_counter()
+        rows = await conn.fetch(sql, query, org_id, k)
+        elapsed = time.perf_counter() - started
+    return [r["id"] for r in rows], elapsed
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def main(args) -> None:
+    table, column, where = TARGETS[args.table]
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        queries = await sample_queries(conn, table, column, where, args.org_id, args.queries, args.noise)
+        if not queries:
+            raise SystemExit(f"No vectors found in {table}.{column}")
+
+        sql = (
+            f"SELECT id FROM {table} "
+            f"WHERE {column} IS NOT NULL AND ($2::uuid IS NULL OR org_id = $2::uuid) {where} "
+            f"ORDER BY {column} <=> $1::vector LIMIT $3"
+        )
+
+        # Ground truth: exact scan
+        exact, exact_times = [], []
+        for query in queries:
+            ids, elapsed = await run_query(
+                conn, sql, query, args.org_id, args.k,
+                ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+            )
+            exact.append(set(ids))
+            exact_times.append(elapsed)
+
+        print(f"{table}.{column}: {len(queries)} queries, k={args.k}")
+        print(f"{'mode':<16}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        print(f"{'exact':<16}{1.0:>10.3f}{statistics.median(exact_times) * 1000:>10.2f}{percentile(exact_times, 0.95) * 1000:>10.2f}")
+
+        for ef_search in args.ef_search:
+            recalls, times = [], []
+            for query, truth in zip(queries, exact):
+                ids, elapsed = await run_query(
+                    conn, sql, query, args.org_id, args.k,
+                    [f"SET LOCAL hnsw.ef_search = {int(ef_search)}"]
+                )
+                recalls.append(len(truth & set(ids)) / max(len(truth), 1))
+                times.append(elapsed)
+            print(
+                f"{'hnsw ef=' + str(ef_search):<16}{statistics.mean(recalls):>10.3f}"
+                f"{statistics.median(times) * 1000:>10.2f}{percentile(times, 0.95) * 1000:>10.2f}"
+            )
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres DSN (default: $DATABASE_URL)")
+    parser.add_argument("--table", choices=sorted(TARGETS), default="tickets")
+    parser.add_argument("--org-id", default=None, help="Restrict to one organization")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.02, help="Gaussian noise added to sampled query vectors")
+    parser.add_argument(
+        "--ef-search",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[10, 20, 40, 80, 160]
+    )
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+    asyncio.run(main(args))
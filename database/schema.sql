@@ -41,6 +41,7 @@ CREATE TABLE uploads (
     s3_key VARCHAR(500),
     row_count INTEGER DEFAULT 0,
     status VARCHAR(100) DEFAULT 'processing',
+    token_usage JSONB DEFAULT '{}',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
@@ -79,6 +80,20 @@ CREATE TABLE cluster_tickets (
     PRIMARY KEY (cluster_id, ticket_id)
 );
 
+-- Cluster merge tree (Ward hierarchy over leaf sub-clusters) for re-granularity
+CREATE TABLE cluster_hierarchies (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    upload_id UUID REFERENCES uploads(id) ON DELETE CASCADE,
+    n_leaves INTEGER NOT NULL,
+    default_n_clusters INTEGER NOT NULL,
+    merges JSONB NOT NULL,           -- (n_leaves - 1) x [node_a, node_b, distance, ticket_count]
+    leaf_counts JSONB NOT NULL,
+    leaf_centroids JSONB NOT NULL,
+    leaf_keywords JSONB DEFAULT '[]',
+    leaf_cluster_ids JSONB DEFAULT '[]',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
 
 -- Knowledge entries table (SME feedback)
 CREATE TABLE knowledge_entries (
@@ -102,9 +117,40 @@ CREATE TABLE knowledge_entries (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Stored cluster assessments, reused until the knowledge set or prompt version changes
+CREATE TABLE cluster_assessments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    cluster_id UUID NOT NULL REFERENCES clusters(id) ON DELETE CASCADE,
+    knowledge_fingerprint VARCHAR(64) NOT NULL,  -- sha256 of sorted knowledge entry IDs
+    knowledge_ids JSONB DEFAULT '[]',
+    prompt_version VARCHAR(20) NOT NULL,
+    assessment JSONB NOT NULL,
+    stale BOOLEAN DEFAULT FALSE,  -- Set when newly approved knowledge may change it
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(cluster_id, knowledge_fingerprint, prompt_version)
+);
+
+-- Background jobs (recluster, bulk assessment, ...)
+CREATE TABLE jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    upload_id UUID REFERENCES uploads(id) ON DELETE CASCADE,
+    job_type VARCHAR(50) NOT NULL,
+    status VARCHAR(50) DEFAULT 'queued',
+    params JSONB DEFAULT '{}',
+    progress JSONB DEFAULT '{}',
+    result JSONB,
+    token_usage JSONB DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Audit logs table
 CREATE TABLE audit_logs (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
     knowledge_id UUID REFERENCES knowledge_entries(id) ON DELETE CASCADE,
     action VARCHAR(50) NOT NULL,
     actor_id UUID REFERENCES users(id),
@@ -112,22 +158,134 @@ CREATE TABLE audit_logs (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Unlogged staging table for COPY-based bulk ticket loads. Each batch copies its
+-- rows under its own load_id, merges them into tickets and clears them in the
+-- same transaction, so staged rows are never visible to other sessions.
+CREATE UNLOGGED TABLE tickets_staging (
+    load_id UUID NOT NULL,
+    id UUID NOT NULL,
+    org_id UUID NOT NULL,
+    upload_id UUID,
+    ticket_id VARCHAR(100) NOT NULL,
+    description TEXT NOT NULL,
+    category VARCHAR(255),
+    subcategory VARCHAR(255),
+    priority VARCHAR(50),
+    raw_data JSONB,
+    embedding vector(384),
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Indexes for performance
 CREATE INDEX idx_tickets_org ON tickets(org_id);
-CREATE INDEX idx_tickets_upload ON tickets(upload_id);
-CREATE INDEX idx_clusters_org ON clusters(org_id);
-CREATE INDEX idx_clusters_upload ON clusters(upload_id);
-CREATE INDEX idx_knowledge_org_status ON knowledge_entries(org_id, status);
+CREATE INDEX idx_tickets_upload ON tickets(upload_id, created_at, id);  -- Keyset pages per upload
+CREATE INDEX idx_tickets_staging_load ON tickets_staging(load_id);
+CREATE INDEX idx_clusters_org ON clusters(org_id, ticket_count DESC, id);  -- Keyset pages, largest first
+CREATE INDEX idx_clusters_upload ON clusters(upload_id, ticket_count DESC, id);
+CREATE INDEX idx_cluster_hierarchies_org_upload ON cluster_hierarchies(org_id, upload_id);
+CREATE INDEX idx_knowledge_org_status ON knowledge_entries(org_id, status, created_at DESC, id DESC);  -- Queue, history, status counts
+CREATE INDEX idx_knowledge_org_created ON knowledge_entries(org_id, created_at DESC, id DESC);  -- Keyset pages, newest first
+CREATE INDEX idx_knowledge_org_submitter ON knowledge_entries(org_id, submitted_by, created_at DESC, id DESC);  -- "My feedback"
 CREATE INDEX idx_schema_mappings_org ON schema_mappings(org_id);
+CREATE INDEX idx_cluster_assessments_org ON cluster_assessments(org_id, cluster_id, updated_at DESC);  -- Latest per cluster
+CREATE INDEX idx_jobs_org ON jobs(org_id, created_at DESC);
+CREATE INDEX idx_uploads_org ON uploads(org_id, created_at DESC);  -- Recent activity
+CREATE INDEX idx_audit_logs_knowledge ON audit_logs(knowledge_id, created_at DESC);
+CREATE INDEX idx_audit_logs_org ON audit_logs(org_id, created_at DESC);  -- Recent activity
+CREATE INDEX idx_knowledge_org_cluster ON knowledge_entries(org_id, cluster_id, status);  -- Coverage per cluster
+
+-- Approximate nearest-neighbour indexes (HNSW, cosine distance) for vector search.
+-- Queries must ORDER BY the distance operator with a LIMIT to use them.
+CREATE INDEX idx_knowledge_embedding_hnsw ON knowledge_entries
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_tickets_embedding_hnsw ON tickets
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_clusters_centroid_hnsw ON clusters
+    USING hnsw (centroid vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 
--- Vector similarity search function for RAG
+-- Vector similarity search function for RAG.
+-- The k nearest entries come from the HNSW index (ORDER BY distance LIMIT k);
+-- the similarity threshold is applied afterwards so it cannot defeat the index.
+-- ef_search is the scan's candidate list size: higher = better recall, slower.
+-- The org / status filters apply to the scanned candidates, so on pgvector 0.8+
+-- the scan is iterative: it keeps expanding until match_count rows pass them,
+-- instead of returning nothing when other orgs' rows fill the candidate list.
 CREATE OR REPLACE FUNCTION search_knowledge(
     query_embedding vector(384),
     match_org_id UUID,
     match_threshold FLOAT DEFAULT 0.7,
-    match_count INT DEFAULT 3
+    match_count INT DEFAULT 3,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    org_id UUID,
+    category VARCHAR,
+    subcategory VARCHAR,
+    current_process TEXT,
+    automation_level VARCHAR,
+    tools_used JSONB,
+    blockers TEXT,
+    resolution_steps JSONB,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM set_config('hnsw.ef_search', GREATEST(ef_search, match_count)::TEXT, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8: plain post-filtered scan
+    END;
+
+    RETURN QUERY
+    SELECT
+        nearest.id,
+        nearest.org_id,
+        nearest.category,
+        nearest.subcategory,
+        nearest.current_process,
+        nearest.automation_level,
+        nearest.tools_used,
+        nearest.blockers,
+        nearest.resolution_steps,
+        nearest.similarity
+    FROM (
+        SELECT
+            ke.id,
+            ke.org_id,
+            ke.category,
+            ke.subcategory,
+            ke.current_process,
+            ke.automation_level,
+            ke.tools_used,
+            ke.blockers,
+            ke.resolution_steps,
+            1 - (ke.embedding <=> query_embedding) AS similarity
+        FROM knowledge_entries ke
+        WHERE ke.org_id = match_org_id
+          AND ke.status = 'approved'
+          AND ke.embedding IS NOT NULL
+        ORDER BY ke.embedding <=> query_embedding
+        LIMIT match_count
+    ) nearest
+    WHERE nearest.similarity > match_threshold
+    ORDER BY nearest.similarity DESC;
+END;
+$$;
+
+-- Batched RAG retrieval: top-k approved knowledge for every query vector in one call.
+-- query_index is the 0-based position of the query in query_embeddings.
+CREATE OR REPLACE FUNCTION search_knowledge_batch(
+    query_embeddings vector(384)[],
+    match_org_id UUID,
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 3,
+    ef_search INT DEFAULT 40
 )
 RETURNS TABLE (
+    query_index INT,
     id UUID,
     org_id UUID,
     category VARCHAR,
@@ -142,28 +300,423 @@ RETURNS TABLE (
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    PERFORM set_config('hnsw.ef_search', GREATEST(ef_search, match_count)::TEXT, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8: plain post-filtered scan
+    END;
+
     RETURN QUERY
     SELECT
-        ke.id,
-        ke.org_id,
-        ke.category,
-        ke.subcategory,
-        ke.current_process,
-        ke.automation_level,
-        ke.tools_used,
-        ke.blockers,
-        ke.resolution_steps,
-        1 - (ke.embedding <=> query_embedding) AS similarity
-    FROM knowledge_entries ke
-    WHERE ke.org_id = match_org_id
-      AND ke.status = 'approved'
-      AND ke.embedding IS NOT NULL
-      AND 1 - (ke.embedding <=> query_embedding) > match_threshold
-    ORDER BY ke.embedding <=> query_embedding
+        (q.position - 1)::INT,
+        nearest.id,
+        nearest.org_id,
+        nearest.category,
+        nearest.subcategory,
+        nearest.current_process,
+        nearest.automation_level,
+        nearest.tools_used,
+        nearest.blockers,
+        nearest.resolution_steps,
+        nearest.similarity
+    FROM unnest(query_embeddings) WITH ORDINALITY AS q(query, position)
+    CROSS JOIN LATERAL (
+        SELECT
+            ke.id,
+            ke.org_id,
+            ke.category,
+            ke.subcategory,
+            ke.current_process,
+            ke.automation_level,
+            ke.tools_used,
+            ke.blockers,
+            ke.resolution_steps,
+            1 - (ke.embedding <=> q.query) AS similarity
+        FROM knowledge_entries ke
+        WHERE ke.org_id = match_org_id
+          AND ke.status = 'approved'
+          AND ke.embedding IS NOT NULL
+        ORDER BY ke.embedding <=> q.query
+        LIMIT match_count
+    ) nearest
+    WHERE nearest.similarity > match_threshold
+    ORDER BY q.position, nearest.similarity DESC;
+END;
+$$;
+
+-- Clusters whose centroid is similar to an embedding (e.g. newly approved knowledge).
+-- Same index-first shape (and iterative scan) as search_knowledge.
+CREATE OR REPLACE FUNCTION search_clusters(
+    query_embedding vector(384),
+    match_org_id UUID,
+    match_threshold FLOAT DEFAULT 0.5,
+    match_count INT DEFAULT 50,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    upload_id UUID,
+    auto_name VARCHAR,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM set_config('hnsw.ef_search', GREATEST(ef_search, match_count)::TEXT, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8: plain post-filtered scan
+    END;
+
+    RETURN QUERY
+    SELECT
+        nearest.id,
+        nearest.upload_id,
+        nearest.auto_name,
+        nearest.similarity
+    FROM (
+        SELECT
+            c.id,
+            c.upload_id,
+            c.auto_name,
+            1 - (c.centroid <=> query_embedding) AS similarity
+        FROM clusters c
+        WHERE c.org_id = match_org_id
+          AND c.centroid IS NOT NULL
+        ORDER BY c.centroid <=> query_embedding
+        LIMIT match_count
+    ) nearest
+    WHERE nearest.similarity > match_threshold
+    ORDER BY nearest.similarity DESC;
+END;
+$$;
+
+-- "Tickets like this one": nearest neighbours of a ticket within its org, with
+-- optional upload / category / date filters. Uses the HNSW index on
+-- tickets.embedding; where pgvector supports iterative index scans (0.8+),
+-- filtered queries keep scanning until match_count rows pass the filters.
+CREATE OR REPLACE FUNCTION search_similar_tickets(
+    p_ticket_id UUID,
+    match_org_id UUID,
+    match_count INT DEFAULT 10,
+    filter_upload_id UUID DEFAULT NULL,
+    filter_category VARCHAR DEFAULT NULL,
+    created_after TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    created_before TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    upload_id UUID,
+    ticket_id VARCHAR,
+    description TEXT,
+    category VARCHAR,
+    subcategory VARCHAR,
+    priority VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    query_embedding vector(384);
+BEGIN
+    SELECT t.embedding INTO query_embedding
+    FROM tickets t
+    WHERE t.id = p_ticket_id AND t.org_id = match_org_id;
+
+    IF query_embedding IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM set_config('hnsw.ef_search', GREATEST(ef_search, match_count + 1)::TEXT, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8: plain post-filtered scan
+    END;
+
+    RETURN QUERY
+    SELECT
+        t.id,
+        t.upload_id,
+        t.ticket_id,
+        t.description,
+        t.category,
+        t.subcategory,
+        t.priority,
+        t.created_at,
+        1 - (t.embedding <=> query_embedding) AS similarity
+    FROM tickets t
+    WHERE t.org_id = match_org_id
+      AND t.embedding IS NOT NULL
+      AND t.id <> p_ticket_id
+      AND (filter_upload_id IS NULL OR t.upload_id = filter_upload_id)
+      AND (filter_category IS NULL OR t.category = filter_category)
+      AND (created_after IS NULL OR t.created_at >= created_after)
+      AND (created_before IS NULL OR t.created_at < created_before)
+    ORDER BY t.embedding <=> query_embedding
     LIMIT match_count;
 END;
 $$;
 
+-- Knowledge entries per status for an org (index-only scan on idx_knowledge_org_status).
+CREATE OR REPLACE FUNCTION count_knowledge_by_status(p_org_id UUID)
+RETURNS TABLE (status VARCHAR, count BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT ke.status, COUNT(*)
+    FROM knowledge_entries ke
+    WHERE ke.org_id = p_org_id
+    GROUP BY ke.status;
+$$;
+
+-- Latest assessment per cluster of an org (or of one cluster), preferring ones not marked stale.
+CREATE OR REPLACE FUNCTION get_latest_assessments(p_org_id UUID, p_cluster_id UUID DEFAULT NULL)
+RETURNS TABLE (cluster_id UUID, assessment JSONB, stale BOOLEAN, updated_at TIMESTAMPTZ)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT ON (ca.cluster_id) ca.cluster_id, ca.assessment, ca.stale, ca.updated_at
+    FROM cluster_assessments ca
+    WHERE ca.org_id = p_org_id
+      AND (p_cluster_id IS NULL OR ca.cluster_id = p_cluster_id)
+    ORDER BY ca.cluster_id, COALESCE(ca.stale, FALSE), ca.updated_at DESC;
+$$;
+
+-- Tickets and clusters per cluster name (sme_name, else auto_name), largest first.
+CREATE OR REPLACE FUNCTION get_cluster_categories(p_org_id UUID)
+RETURNS TABLE (name VARCHAR, cluster_count BIGINT, ticket_count BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(c.sme_name, c.auto_name, 'Unknown')::VARCHAR, COUNT(*), COALESCE(SUM(c.ticket_count), 0)
+    FROM clusters c
+    WHERE c.org_id = p_org_id
+    GROUP BY 1
+    ORDER BY 3 DESC, 1;
+$$;
+
+-- Dashboard aggregates of an org in one round trip: totals, knowledge status
+-- counts, the p_limit largest per-name rollups, knowledge coverage and recent
+-- activity. Reads clusters (ticket totals come from ticket_count), knowledge
+-- and the newest uploads / audit entries only, never the tickets table; lists
+-- are capped at p_limit so the payload size doesn't grow with the org.
+CREATE OR REPLACE FUNCTION get_analytics_dashboard(p_org_id UUID, p_limit INT DEFAULT 10)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH org_clusters AS MATERIALIZED (
+        SELECT c.id, c.upload_id, c.auto_name, c.sme_name, c.summary, c.ticket_count, c.created_at,
+               COALESCE(c.sme_name, c.auto_name, 'Unknown') AS name
+        FROM clusters c
+        WHERE c.org_id = p_org_id
+    ),
+    cluster_knowledge AS (
+        SELECT ke.cluster_id,
+               bool_or(ke.status = 'approved') AS approved,
+               bool_or(ke.status = 'pending') AS pending
+        FROM knowledge_entries ke
+        WHERE ke.org_id = p_org_id AND ke.cluster_id IS NOT NULL
+        GROUP BY ke.cluster_id
+    ),
+    coverage AS MATERIALIZED (
+        SELECT oc.*,
+               CASE WHEN ck.approved THEN 'covered' WHEN ck.pending THEN 'pending' ELSE 'uncovered' END AS coverage
+        FROM org_clusters oc
+        LEFT JOIN cluster_knowledge ck ON ck.cluster_id = oc.id
+    ),
+    activity AS (
+        (
+            SELECT u.id, 'upload' AS type,
+                   'Uploaded ' || u.filename || ' (' || COALESCE(u.row_count, 0) || ' tickets)' AS description,
+                   u.created_at AS "timestamp"
+            FROM uploads u
+            WHERE u.org_id = p_org_id
+            ORDER BY u.created_at DESC
+            LIMIT p_limit
+        )
+        UNION ALL
+        (
+            SELECT a.id,
+                   CASE WHEN a.action = 'submitted' THEN 'feedback' ELSE 'approval' END,
+                   'Knowledge for ' || COALESCE(ke.category, 'uncategorized') || ' ' || a.action,
+                   a.created_at
+            FROM audit_logs a
+            JOIN knowledge_entries ke ON ke.id = a.knowledge_id
+            WHERE a.org_id = p_org_id
+            ORDER BY a.created_at DESC
+            LIMIT p_limit
+        )
+    )
+    SELECT jsonb_build_object(
+        'total_clusters', (SELECT COUNT(*) FROM org_clusters),
+        'total_tickets', (SELECT COALESCE(SUM(ticket_count), 0) FROM org_clusters),
+        'knowledge_by_status', COALESCE(
+            (SELECT jsonb_object_agg(s.status, s.count)
+             FROM (SELECT ke.status, COUNT(*) AS count FROM knowledge_entries ke WHERE ke.org_id = p_org_id GROUP BY ke.status) s),
+            '{}'::jsonb
+        ),
+        'clusters_by_coverage', COALESCE(
+            (SELECT jsonb_object_agg(s.coverage, s.count)
+             FROM (SELECT coverage, COUNT(*) AS count FROM coverage GROUP BY coverage) s),
+            '{}'::jsonb
+        ),
+        'categories', COALESCE(
+            (SELECT jsonb_agg(jsonb_build_object('name', s.name, 'cluster_count', s.cluster_count, 'ticket_count', s.ticket_count)
+                              ORDER BY s.ticket_count DESC, s.name)
+             FROM (SELECT name, COUNT(*) AS cluster_count, COALESCE(SUM(ticket_count), 0) AS ticket_count
+                   FROM org_clusters GROUP BY name
+                   ORDER BY ticket_count DESC, name LIMIT p_limit) s),
+            '[]'::jsonb
+        ),
+        'top_clusters', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(t) ORDER BY t.ticket_count DESC, t.id)
+             FROM (SELECT id, upload_id, auto_name, sme_name, summary, ticket_count, created_at
+                   FROM org_clusters ORDER BY ticket_count DESC, id LIMIT 5) t),
+            '[]'::jsonb
+        ),
+        'uncovered_clusters', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(t) ORDER BY t.ticket_count DESC, t.id)
+             FROM (SELECT id, upload_id, auto_name, sme_name, summary, ticket_count, created_at
+                   FROM coverage WHERE coverage <> 'covered' ORDER BY ticket_count DESC, id LIMIT p_limit) t),
+            '[]'::jsonb
+        ),
+        'recent_activity', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(t) ORDER BY t."timestamp" DESC)
+             FROM (SELECT * FROM activity ORDER BY "timestamp" DESC LIMIT p_limit) t),
+            '[]'::jsonb
+        )
+    );
+$$;
+
+-- LLM token usage of an org summed in the database: totals, per call type and
+-- per upload (ingestion plus the upload's jobs), and the p_limit newest jobs.
+CREATE OR REPLACE FUNCTION get_token_usage(p_org_id UUID, p_limit INT DEFAULT 50)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH usage AS MATERIALIZED (
+        SELECT u.id AS upload_id, u.token_usage FROM uploads u WHERE u.org_id = p_org_id
+        UNION ALL
+        SELECT j.upload_id, j.token_usage FROM jobs j WHERE j.org_id = p_org_id
+    ),
+    call_types AS (
+        SELECT ct.key AS call_type,
+               SUM(COALESCE((ct.value->>'calls')::BIGINT, 0)) AS calls,
+               SUM(COALESCE((ct.value->>'prompt_tokens')::BIGINT, 0)) AS prompt_tokens,
+               SUM(COALESCE((ct.value->>'completion_tokens')::BIGINT, 0)) AS completion_tokens
+        FROM usage, jsonb_each(COALESCE(usage.token_usage->'by_call_type', '{}'::jsonb)) AS ct
+        GROUP BY ct.key
+    ),
+    upload_totals AS (
+        SELECT upload_id, SUM(COALESCE((token_usage->>'total_tokens')::BIGINT, 0)) AS total_tokens
+        FROM usage
+        WHERE upload_id IS NOT NULL
+        GROUP BY upload_id
+    )
+    SELECT jsonb_build_object(
+        'totals', (
+            SELECT jsonb_build_object(
+                'calls', COALESCE(SUM((token_usage->>'calls')::BIGINT), 0),
+                'cached_calls', COALESCE(SUM((token_usage->>'cached_calls')::BIGINT), 0),
+                'prompt_tokens', COALESCE(SUM((token_usage->>'prompt_tokens')::BIGINT), 0),
+                'completion_tokens', COALESCE(SUM((token_usage->>'completion_tokens')::BIGINT), 0),
+                'total_tokens', COALESCE(SUM((token_usage->>'total_tokens')::BIGINT), 0)
+            )
+            FROM usage
+        ),
+        'by_call_type', COALESCE(
+            (SELECT jsonb_object_agg(call_type, jsonb_build_object(
+                        'calls', calls, 'prompt_tokens', prompt_tokens, 'completion_tokens', completion_tokens))
+             FROM call_types),
+            '{}'::jsonb
+        ),
+        'by_upload', COALESCE(
+            (SELECT jsonb_agg(jsonb_build_object(
+                        'upload_id', u.id, 'filename', u.filename, 'total_tokens', COALESCE(t.total_tokens, 0))
+                    ORDER BY u.created_at DESC)
+             FROM uploads u
+             LEFT JOIN upload_totals t ON t.upload_id = u.id
+             WHERE u.org_id = p_org_id),
+            '[]'::jsonb
+        ),
+        'jobs', COALESCE(
+            (SELECT jsonb_agg(COALESCE(t.token_usage, '{}'::jsonb) || jsonb_build_object(
+                        'job_id', t.id, 'job_type', t.job_type, 'upload_id', t.upload_id)
+                    ORDER BY t.created_at DESC)
+             FROM (SELECT id, job_type, upload_id, token_usage, created_at
+                   FROM jobs WHERE org_id = p_org_id ORDER BY created_at DESC LIMIT p_limit) t),
+            '[]'::jsonb
+        )
+    );
+$$;
+
+-- Insert a cluster set with all ticket memberships in one statement (one transaction).
+-- p_clusters: [{auto_name, summary, ticket_count, centroid, ticket_ids: [...]}, ...]
+-- Returns the new cluster ids in input order.
+CREATE OR REPLACE FUNCTION create_clusters(
+    p_org_id UUID,
+    p_upload_id UUID,
+    p_clusters JSONB
+)
+RETURNS SETOF UUID
+LANGUAGE sql
+AS $$
+    WITH input AS MATERIALIZED (
+        SELECT gen_random_uuid() AS id, c.value, c.position
+        FROM jsonb_array_elements(p_clusters) WITH ORDINALITY AS c(value, position)
+    ),
+    inserted AS (
+        INSERT INTO clusters (id, org_id, upload_id, auto_name, summary, ticket_count, centroid)
+        SELECT
+            input.id,
+            p_org_id,
+            p_upload_id,
+            input.value->>'auto_name',
+            input.value->>'summary',
+            (input.value->>'ticket_count')::INT,
+            (input.value->>'centroid')::vector
+        FROM input
+    ),
+    members AS (
+        INSERT INTO cluster_tickets (cluster_id, ticket_id)
+        SELECT input.id, t::UUID
+        FROM input, jsonb_array_elements_text(input.value->'ticket_ids') AS t
+    )
+    SELECT input.id FROM input ORDER BY input.position;
+$$;
+
+-- Atomically swap the cluster set of an upload (or the whole org when p_upload_id is NULL),
+-- dropping the hierarchies of the same scope.
+-- Same input and result as create_clusters.
+CREATE OR REPLACE FUNCTION replace_clusters(
+    p_org_id UUID,
+    p_upload_id UUID,
+    p_clusters JSONB
+)
+RETURNS SETOF UUID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM clusters
+    WHERE org_id = p_org_id
+      AND (p_upload_id IS NULL OR upload_id = p_upload_id);
+
+    -- Their merge trees reference the deleted cluster ids
+    DELETE FROM cluster_hierarchies
+    WHERE org_id = p_org_id
+      AND (p_upload_id IS NULL OR upload_id = p_upload_id);
+
+    RETURN QUERY SELECT * FROM create_clusters(p_org_id, p_upload_id, p_clusters);
+END;
+$$;
+
 -- Row Level Security (RLS) policies for multi-tenant isolation
 ALTER TABLE organizations ENABLE ROW LEVEL SECURITY;
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
@@ -171,7 +724,10 @@ ALTER TABLE schema_mappings ENABLE ROW LEVEL SECURITY;
 ALTER TABLE uploads ENABLE ROW LEVEL SECURITY;
 ALTER TABLE tickets ENABLE ROW LEVEL SECURITY;
 ALTER TABLE clusters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE cluster_hierarchies ENABLE ROW LEVEL SECURITY;
 ALTER TABLE knowledge_entries ENABLE ROW LEVEL SECURITY;
+ALTER TABLE cluster_assessments ENABLE ROW LEVEL SECURITY;
+ALTER TABLE jobs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;
 
 -- Note: In production, add RLS policies based on your auth setup